@@ -1,36 +1,47 @@
 import streamlit as st
-import openrouteservice
 import folium
 from streamlit_folium import st_folium
 import os
-import math
-from collections import defaultdict, deque
-import heapq
 import pandas as pd
 import numpy as np
 from datetime import datetime
 from geopy.geocoders import Nominatim
 import geopy.distance
 from src.config.config import (
-    ORS_API_KEY,
     DEFAULT_SAFETY_THRESHOLD,
     EMERGENCY_CONTACTS,
     MAP_DEFAULT_CENTER,
     DEHRADUN_BOUNDING_BOX,
-    CRIME_WEIGHTS
+    METRICS_PORT,
+    MAX_DELIVERY_STOPS,
+    RISK_TILES_URL,
+    RISK_TILES_MAX_ZOOM,
+    LANDMARKS_PATH,
+    ROUTING_PROVIDER
 )
+import tracing
+from routing import Graph, dijkstra, a_star, find_nearest_node
+from routing_service import create_routing_provider
+from safety import calculate_safety_score
+from area_lookup import load_area_index, AreaGeocoder
+from route_optimizer import optimise_stops
+from facilities import FacilityLayer, load_facilities, FACILITY_TYPES
+from isochrone import isochrone
+from landmarks import Landmarks, graph_fingerprint
 
-# Initialize OpenRouteService client
-client = openrouteservice.Client(key=ORS_API_KEY)
+logger = tracing.configure_logging()
 
-# Initialize geolocator
-geolocator = Nominatim(user_agent="route_planner")
+# Initialize geolocator; the local routing provider also keeps geocoding offline
+if ROUTING_PROVIDER == 'local':
+    geolocator = AreaGeocoder()
+else:
+    geolocator = Nominatim(user_agent="route_planner")
 
 # Load crime data
 crime_data = pd.read_csv('dehradun_crime_synthetic_data.csv')
 
-# Cache for geocoding results
-geocoding_cache = {}
+# Local point-to-area index used in place of reverse geocoding
+area_index = load_area_index()
 
 # Function to validate coordinates
 def validate_coordinates(coords):
@@ -44,10 +55,9 @@ def validate_coordinates(coords):
 # Function to geocode location (single definition)
 def geocode_location(location):
     # Always bias to Dehradun
-    from geopy.geocoders import Nominatim
-    geolocator = Nominatim(user_agent="route_planner")
     query = f"{location}, Dehradun, Uttarakhand, India"
-    loc = geolocator.geocode(query)
+    with tracing.span('geocode'):
+        loc = geolocator.geocode(query)
     if loc:
         return [loc.latitude, loc.longitude]
     return None
@@ -55,154 +65,82 @@ def geocode_location(location):
 # Function to get area from coordinates
 def get_area_from_coordinates(coords):
     try:
-        cache_key = f"{coords[0]}_{coords[1]}"
-        if cache_key in geocoding_cache:
-            return geocoding_cache[cache_key]
-        location = geolocator.reverse(f"{coords[1]}, {coords[0]}")
-        if not location:
-            return "Unknown Area"
-        address = location.raw.get('address', {})
-        area = address.get('suburb', address.get('neighbourhood', "Unknown Area"))
-        geocoding_cache[cache_key] = area
-        if len(geocoding_cache) > 1000:
-            geocoding_cache.pop(next(iter(geocoding_cache)))
-        return area
+        with tracing.span('area_lookup'):
+            return area_index.lookup(coords[1], coords[0])
     except Exception as e:
         st.error(f"Error getting area: {e}")
         return "Unknown Area"
 
-# Calculate safety scores based on crime data
-def calculate_safety_score(location):
-    try:
-        area_crimes = crime_data[crime_data['Location'] == location]
-        crime_weights = CRIME_WEIGHTS
-        total_score = 0
-        for _, crime in area_crimes.iterrows():
-            crime_type = crime['Crime_Type']
-            total_score += crime_weights.get(crime_type, 1)
-        max_possible_score = sum(crime_weights.values()) * len(area_crimes)
-        if max_possible_score == 0:
-            return 100
-        safety_score = (1 - (total_score / max_possible_score)) * 100
-        return max(0, min(100, safety_score))
-    except Exception as e:
-        print(f"Error calculating safety score: {e}")
-        return 0
-
-# Graph representation of Dehradun roads
-class Graph:
-    def __init__(self):
-        self.graph = defaultdict(list)
-        self.weights = {}
-        self.safety_scores = {}
-    def add_edge(self, u, v, weight, safety_score):
-        self.graph[u].append(v)
-        self.graph[v].append(u)
-        self.weights[(u, v)] = weight
-        self.weights[(v, u)] = weight
-        self.safety_scores[(u, v)] = safety_score
-        self.safety_scores[(v, u)] = safety_score
-    def get_neighbors(self, node):
-        return self.graph[node]
-    def get_weight(self, u, v):
-        return self.weights.get((u, v), float('inf'))
-    def get_safety_score(self, u, v):
-        return self.safety_scores.get((u, v), 0)
-
-# Dijkstra's algorithm with safety score consideration
-def dijkstra(graph, start, end, safety_threshold=50):
-    distances = {node: float('inf') for node in graph.graph}
-    distances[start] = 0
-    pq = [(0, start, [])]
-    visited = set()
-    while pq:
-        (dist, current, path) = heapq.heappop(pq)
-        if current in visited:
-            continue
-        visited.add(current)
-        path = path + [current]
-        if current == end:
-            return path, dist
-        for neighbor in graph.get_neighbors(current):
-            if neighbor in visited:
-                continue
-            weight = graph.get_weight(current, neighbor)
-            safety_score = graph.get_safety_score(current, neighbor)
-            if safety_score < safety_threshold:
-                continue
-            new_dist = dist + weight
-            if new_dist < distances[neighbor]:
-                distances[neighbor] = new_dist
-                heapq.heappush(pq, (new_dist, neighbor, path))
-    return None, float('inf')
-
-# A* algorithm with safety score consideration
-def a_star(graph, start, end, safety_threshold=50):
-    def heuristic(a, b):
-        lat1, lon1 = a
-        lat2, lon2 = b
-        R = 6371
-        phi1 = math.radians(lat1)
-        phi2 = math.radians(lat2)
-        delta_phi = math.radians(lat2 - lat1)
-        delta_lambda = math.radians(lon2 - lon1)
-        a_ = math.sin(delta_phi/2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda/2)**2
-        c = 2 * math.atan2(math.sqrt(a_), math.sqrt(1-a_))
-        return R * c
-    open_set = []
-    heapq.heappush(open_set, (0, start))
-    came_from = {}
-    g_score = {node: float('inf') for node in graph.graph}
-    g_score[start] = 0
-    f_score = {node: float('inf') for node in graph.graph}
-    f_score[start] = heuristic(start, end)
-    while open_set:
-        _, current = heapq.heappop(open_set)
-        if current == end:
-            path = []
-            while current in came_from:
-                path.append(current)
-                current = came_from[current]
-            path.append(start)
-            return path[::-1], g_score[end]
-        for neighbor in graph.get_neighbors(current):
-            tentative_g_score = g_score[current] + graph.get_weight(current, neighbor)
-            if tentative_g_score >= g_score[neighbor]:
-                continue
-            safety_score = graph.get_safety_score(current, neighbor)
-            if safety_score < safety_threshold:
-                continue
-            came_from[neighbor] = current
-            g_score[neighbor] = tentative_g_score
-            f_score[neighbor] = tentative_g_score + heuristic(neighbor, end)
-            if neighbor not in [x[1] for x in open_set]:
-                heapq.heappush(open_set, (f_score[neighbor], neighbor))
-    return None, float('inf')
-
 # Initialize graph with actual road network data
 graph = Graph()
 areas = crime_data['Location'].unique()
+# Geocode every area once rather than once per pair
+area_coords = {}
 for area in areas:
     location = geolocator.geocode(f"{area}, Dehradun", timeout=10)
     if location:
-        coords = (location.latitude, location.longitude)
-        for other_area in areas:
-            if other_area != area:
-                other_location = geolocator.geocode(f"{other_area}, Dehradun", timeout=10)
-                if other_location:
-                    other_coords = (other_location.latitude, other_location.longitude)
-                    distance = geopy.distance.geodesic(coords, other_coords).km
-                    safety_score = calculate_safety_score(area)
-                    graph.add_edge(
-                        coords,
-                        other_coords,
-                        weight=distance,
-                        safety_score=safety_score
-                    )
+        area_coords[area] = (location.latitude, location.longitude)
+for area, coords in area_coords.items():
+    safety_score = calculate_safety_score(area, crime_data)
+    for other_area, other_coords in area_coords.items():
+        if other_area != area:
+            distance = geopy.distance.geodesic(coords, other_coords).km
+            graph.add_edge(
+                coords,
+                other_coords,
+                weight=distance,
+                safety_score=safety_score
+            )
 graph.add_edge((30.3165, 78.0322), (30.3265, 78.0422), 2.5, 85)
 graph.add_edge((30.3265, 78.0422), (30.3365, 78.0522), 3.0, 90)
 graph.add_edge((30.3165, 78.0322), (30.3365, 78.0522), 4.0, 75)
 
+# The graph itself is not hashed by the resource caches below; these keys
+# make them rebuild when the roads or their safety scores change, replacing
+# the entry built for the old graph
+road_key = graph_fingerprint(graph)
+safety_key = graph_fingerprint(graph, include_safety=True)
+
+# Routing provider is kept across Streamlit reruns so its connection pool,
+# in-flight request table and route cache survive
+@st.cache_resource(max_entries=1)
+def get_routing_provider(_graph, graph_key):
+    return create_routing_provider(_graph)
+
+routing_provider = get_routing_provider(graph, safety_key)
+
+# Landmark distances ignore safety scores, so they stay valid across
+# threshold changes and only need rebuilding when the road graph changes
+@st.cache_resource(max_entries=1)
+def get_landmarks(_graph, graph_key):
+    if os.path.exists(LANDMARKS_PATH):
+        landmarks = Landmarks.load(LANDMARKS_PATH, _graph)
+        if landmarks is not None:
+            return landmarks
+    landmarks = Landmarks.build(_graph)
+    landmarks.save(LANDMARKS_PATH)
+    return landmarks
+
+landmarks = get_landmarks(graph, road_key)
+
+# Nearest-facility labels only change with the graph or the safety threshold;
+# keep just the layers for the last few thresholds picked on the slider
+@st.cache_resource(max_entries=4)
+def get_facility_layer(_graph, graph_key, safety_threshold):
+    return FacilityLayer(_graph, load_facilities(), safety_threshold)
+
+def show_nearest_facilities(path, safety_threshold):
+    """Show the nearest hospital, police and fire station reachable from the route."""
+    facility_layer = get_facility_layer(graph, safety_key, safety_threshold)
+    with st.sidebar:
+        st.header("Nearest Help on Route")
+        for facility_type, label in FACILITY_TYPES.items():
+            facility = facility_layer.nearest_along(path, facility_type)
+            if facility:
+                st.write(f"Nearest {label}: {facility['name']} ({facility['distance']:.2f} km from route)")
+            else:
+                st.write(f"Nearest {label}: none reachable on safe roads")
+
 # Dehradun coordinates and bounding box
 dehradun_center = [30.3165, 78.0322]
 
@@ -220,24 +158,87 @@ Plan your routes within Dehradun city with ease!
 
 default_safety_threshold = int(os.getenv('DEFAULT_SAFETY_THRESHOLD', 70))
 
-def find_nearest_node(graph, coord):
-    """Find the nearest node in the graph to the given coordinate (lat, lng)."""
-    from math import radians, cos, sin, sqrt, atan2
-    min_dist = float('inf')
-    nearest = None
-    lat1, lng1 = coord
-    for node in graph.graph.keys():
-        lat2, lng2 = node
-        # Haversine formula
-        dlat = radians(lat2 - lat1)
-        dlng = radians(lng2 - lng1)
-        a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlng/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
-        dist = 6371 * c  # Earth radius in km
-        if dist < min_dist:
-            min_dist = dist
-            nearest = node
-    return nearest
+def add_risk_overlay(map):
+    """
+    Add the pre-rendered risk heatmap tiles (see risk_tiles.py). Only done when
+    RISK_TILES_URL is configured, since the viewer's browser fetches them.
+    """
+    if not RISK_TILES_URL:
+        return
+    folium.TileLayer(
+        tiles=RISK_TILES_URL,
+        attr="Crime and accident data",
+        name="Risk Heatmap",
+        overlay=True,
+        control=True,
+        opacity=0.6,
+        max_native_zoom=RISK_TILES_MAX_ZOOM
+    ).add_to(map)
+
+def plan_delivery_run(stop_names, safety_threshold, return_to_depot):
+    """Geocode delivery stops, optimise their order and draw the run on the map."""
+    stop_coords = []
+    for name in stop_names:
+        coords = geocode_location(name)
+        if not coords:
+            st.error(f"Could not find location: {name}")
+            return
+        stop_coords.append(coords)
+    with tracing.span('snap'):
+        nodes = [find_nearest_node(graph, tuple(coords)) for coords in stop_coords]
+    try:
+        with tracing.span('optimise_stops'):
+            run = optimise_stops(graph, nodes, safety_threshold, return_to_start=return_to_depot)
+    except ValueError as e:
+        st.error(f"Error planning delivery run: {e}")
+        return
+    with tracing.span('render'):
+        for position, index in enumerate(run['order'][:len(stop_names)]):
+            folium.Marker(
+                location=stop_coords[index],
+                popup=f"{position + 1}. {stop_names[index]}",
+                icon=folium.Icon(color='green' if position == 0 else 'orange')
+            ).add_to(st.session_state.map)
+        folium.PolyLine(
+            [[lat, lng] for lat, lng in run['path']],
+            color='purple',
+            weight=5,
+            opacity=0.7
+        ).add_to(st.session_state.map)
+    st.subheader("Delivery Run")
+    for position, index in enumerate(run['order']):
+        leg = f" ({run['legs'][position - 1]:.2f} km)" if position else ""
+        st.write(f"{position + 1}. {stop_names[index]}{leg}")
+    st.write(f"Total Distance: {run['distance']:.2f} km")
+    st.write(f"Lowest Safety Score on Route: {run['min_safety']:.0f}")
+    st.write("Purple line shows the optimised delivery run")
+
+def show_reachable_area(depot_name, max_distance, safety_threshold):
+    """Outline the area reachable from a depot on roads above the safety threshold."""
+    depot_coords = geocode_location(depot_name)
+    if not depot_coords:
+        st.error(f"Could not find location: {depot_name}")
+        return
+    with tracing.span('snap'):
+        depot = find_nearest_node(graph, tuple(depot_coords))
+    reached = isochrone(graph, depot, max_distance, safety_threshold)
+    with tracing.span('render'):
+        folium.Marker(
+            location=depot_coords,
+            popup=f"Depot: {depot_name}",
+            icon=folium.Icon(color='blue')
+        ).add_to(st.session_state.map)
+        if reached['polygon']:
+            folium.Polygon(
+                reached['polygon'],
+                color='orange',
+                fill=True,
+                fill_opacity=0.2,
+                popup=f"Reachable within {max_distance} km"
+            ).add_to(st.session_state.map)
+    st.subheader("Reachable Area")
+    st.write(f"{len(reached['costs'])} road points reachable within {max_distance} km "
+             f"on roads with safety score of at least {safety_threshold}")
 
 def main():
     if 'clicked_points' not in st.session_state:
@@ -252,6 +253,7 @@ def main():
             control_scale=True,
             prefer_canvas=True
         )
+        add_risk_overlay(st.session_state.map)
         folium.LayerControl().add_to(st.session_state.map)
         folium.LatLngPopup().add_to(st.session_state.map)
 
@@ -348,6 +350,7 @@ def main():
                 control_scale=True,
                 prefer_canvas=True
             )
+            add_risk_overlay(st.session_state.map)
             folium.LayerControl().add_to(st.session_state.map)
             folium.LatLngPopup().add_to(st.session_state.map)
             st.session_state.find_routes = False
@@ -355,13 +358,19 @@ def main():
     if st.session_state.get('find_routes', False) and (start_location_input and end_location_input):
         start_coords = geocode_location(start_location_input)
         end_coords = geocode_location(end_location_input)
-        print(f"DEBUG: Start coords: {start_coords}, End coords: {end_coords}")
+        logger.debug("Start coords: %s, End coords: %s", start_coords, end_coords)
+        for name, coords in ((start_location_input, start_coords), (end_location_input, end_coords)):
+            if not coords:
+                st.error(f"Could not find location: {name}")
+                st.session_state.find_routes = False
+                return
         # Snap to nearest graph node
-        snapped_start = find_nearest_node(graph, tuple(start_coords))
-        snapped_end = find_nearest_node(graph, tuple(end_coords))
-        print(f"DEBUG: Snapped start: {snapped_start}, Snapped end: {snapped_end}")
-        print(f"DEBUG: Start in graph: {snapped_start in graph.graph}")
-        print(f"DEBUG: End in graph: {snapped_end in graph.graph}")
+        with tracing.span('snap'):
+            snapped_start = find_nearest_node(graph, tuple(start_coords))
+            snapped_end = find_nearest_node(graph, tuple(end_coords))
+        logger.debug("Snapped start: %s, Snapped end: %s", snapped_start, snapped_end)
+        logger.debug("Start in graph: %s", snapped_start in graph.graph)
+        logger.debug("End in graph: %s", snapped_end in graph.graph)
         if not snapped_start or not snapped_end:
             st.error("Could not find a nearby node in the graph for start or end location.")
             return
@@ -378,10 +387,12 @@ def main():
         try:
             start_point = tuple(snapped_start)
             end_point = tuple(snapped_end)
-            dijkstra_path, dijkstra_dist = dijkstra(graph, start_point, end_point, safety_threshold)
-            a_star_path, a_star_dist = a_star(graph, start_point, end_point, safety_threshold)
-            print(f"DEBUG: Dijkstra path: {dijkstra_path}")
-            print(f"DEBUG: A* path: {a_star_path}")
+            with tracing.span('dijkstra'):
+                dijkstra_path, dijkstra_dist = dijkstra(graph, start_point, end_point, safety_threshold)
+            with tracing.span('a_star'):
+                a_star_path, a_star_dist = a_star(graph, start_point, end_point, safety_threshold, landmarks)
+            logger.debug("Dijkstra path: %s", dijkstra_path)
+            logger.debug("A* path: %s", a_star_path)
             routes = []
             if dijkstra_path:
                 dijkstra_coords = [[point[1], point[0]] for point in dijkstra_path]
@@ -411,16 +422,17 @@ def main():
                         'color': 'green'
                     }
                 })
-            for route in routes:
-                folium.GeoJson(
-                    route,
-                    name=route['properties']['name'],
-                    style_function=lambda x, color=route['properties']['color']: {
-                        'color': color,
-                        'weight': 5,
-                        'opacity': 0.7
-                    }
-                ).add_to(st.session_state.map)
+            with tracing.span('render'):
+                for route in routes:
+                    folium.GeoJson(
+                        route,
+                        name=route['properties']['name'],
+                        style_function=lambda x, color=route['properties']['color']: {
+                            'color': color,
+                            'weight': 5,
+                            'opacity': 0.7
+                        }
+                    ).add_to(st.session_state.map)
             st.subheader("Route Information")
             if dijkstra_path:
                 st.write(f"Dijkstra Route Distance: {dijkstra_dist:.2f} km")
@@ -429,6 +441,8 @@ def main():
             st.write("Blue line shows the Dijkstra route")
             st.write("Green line shows the A* route")
             st.write("Routes are calculated based on safety scores and distances")
+            if dijkstra_path:
+                show_nearest_facilities(dijkstra_path, safety_threshold)
             st.session_state.find_routes = False
             # After adding the routes, fit the map to the route bounds if a path exists and has more than 1 point
             if dijkstra_path and len(dijkstra_path) > 1:
@@ -445,26 +459,73 @@ def main():
     if len(st.session_state.clicked_points) == 2:
         start_coords = [st.session_state.clicked_points[0]['lat'], st.session_state.clicked_points[0]['lng']]
         end_coords = [st.session_state.clicked_points[1]['lat'], st.session_state.clicked_points[1]['lng']]
-        route = client.directions(
-            coordinates=[start_coords[::-1], end_coords[::-1]],
-            profile='driving-car',
-            format='geojson'
-        )
-        folium.GeoJson(
-            route,
-            name='route',
-            style_function=lambda x: {
-                'color': 'blue',
-                'weight': 5,
-                'opacity': 0.7
-            }
-        ).add_to(st.session_state.map)
-        st.subheader("Route Information")
-        st.write("Route calculated successfully!")
-        st.write("Blue line shows the driving route")
+        try:
+            route = routing_provider.directions(
+                coordinates=[start_coords[::-1], end_coords[::-1]],
+                profile='driving-car',
+                format='geojson'
+            )
+        except Exception as e:
+            st.error(f"Error calculating route: {e}")
+        else:
+            folium.GeoJson(
+                route,
+                name='route',
+                style_function=lambda x: {
+                    'color': 'blue',
+                    'weight': 5,
+                    'opacity': 0.7
+                }
+            ).add_to(st.session_state.map)
+            st.subheader("Route Information")
+            st.write("Route calculated successfully!")
+            st.write("Blue line shows the driving route")
+
+    # Handle multi-stop delivery run
+    st.subheader("Multi-stop Delivery Run")
+    stops_input = st.text_area(
+        "Delivery Stops (one per line, the first is the depot)",
+        key="delivery_stops_input"
+    )
+    return_to_depot = st.checkbox("Return to depot", key="return_to_depot")
+    if st.button("Optimise Stops"):
+        stop_names = [line.strip() for line in stops_input.splitlines() if line.strip()]
+        if len(stop_names) < 2:
+            st.error("Enter at least two stops.")
+        elif len(stop_names) > MAX_DELIVERY_STOPS:
+            st.error(f"A delivery run can have at most {MAX_DELIVERY_STOPS} stops.")
+        else:
+            plan_delivery_run(stop_names, safety_threshold, return_to_depot)
+
+    # Handle reachability from a depot
+    st.subheader("Reachable Area")
+    depot_input = st.text_input("Depot Location", key="depot_input")
+    reach_distance = st.number_input("Distance Budget (km)", min_value=0.5, max_value=100.0, value=5.0, step=0.5)
+    if st.button("Show Reachable Area") and depot_input:
+        show_reachable_area(depot_input, reach_distance, safety_threshold)
 
     # Always display the map at the end with increased size
-    st_folium(st.session_state.map, height=700, width=1000, returned_objects=[])
+    with tracing.span('map_display'):
+        st_folium(st.session_state.map, height=700, width=1000, returned_objects=[])
+
+# Metrics endpoint is started once per server process, not on every rerun
+@st.cache_resource
+def start_metrics_server(port):
+    return tracing.start_metrics_server(port)
+
+def show_latency_breakdown(trace):
+    with st.sidebar.expander("Latency Breakdown"):
+        for stage, seconds in trace.breakdown().items():
+            st.write(f"{stage}: {seconds * 1000:.1f} ms")
+        for name, value in trace.counters.items():
+            st.write(f"{name}: {value:g}")
+    logger.info("Request took %.1f ms: %s", trace.total() * 1000, trace.breakdown())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if tracing.enabled and METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+    with tracing.trace_request() as trace:
+        main()
+    if trace is not None and trace.spans:
+        show_latency_breakdown(trace)
+    tracing.write_metrics()
\ No newline at end of file
@@ -0,0 +1,357 @@
+"""
+Local point-to-area lookup used instead of Nominatim reverse geocoding.
+
+Areas come either from a CSV of centroids (each point belongs to the Voronoi
+cell of its nearest centroid) or from a GeoJSON file of polygons. A uniform
+grid over the city stores, per cell, the few centroids whose Voronoi cells can
+reach it and the polygons whose bounding box overlaps it, so a batch lookup is
+a handful of vectorized numpy operations and each point is only tested
+against the polygons of its own cell.
+"""
+import json
+import math
+from collections import namedtuple
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.config.config import (
+    AREA_CENTROIDS_PATH,
+    AREA_POLYGONS_PATH,
+    AREA_MAX_DISTANCE_KM,
+    DEHRADUN_BOUNDING_BOX
+)
+
+UNKNOWN_AREA = "Unknown Area"
+KM_PER_DEGREE = 111.32
+# Offset of each cell's polygon reference point from the cell centre, in cells
+REFERENCE_OFFSET = (0.1234567, 0.2345678)
+# Default grid cell for polygon files: boundary cells cost an edge test per
+# nearby edge, so a finer grid than for centroids pays for itself
+POLYGON_CELL_KM = 0.25
+
+
+class AreaIndex:
+    def __init__(self, names: Sequence[str], lats: Sequence[float], lons: Sequence[float],
+                 polygons: Optional[List[List[np.ndarray]]] = None,
+                 max_distance_km: Optional[float] = AREA_MAX_DISTANCE_KM, cell_km: float = 0.5,
+                 nearest_fallback: bool = False):
+        """
+        `names`, `lats` and `lons` describe one centroid per area. `polygons`,
+        if given, holds the rings ([lon, lat] arrays) of each area in the same
+        order; points inside a polygon take its name and points outside every
+        polygon resolve to UNKNOWN_AREA, unless `nearest_fallback` is set, in
+        which case they fall back to the nearest centroid. Points farther than
+        `max_distance_km` from every centroid resolve to UNKNOWN_AREA.
+        """
+        if len(names) == 0:
+            raise ValueError("AreaIndex needs at least one area")
+        # The extra trailing name lets "unknown" be an ordinary index
+        self.names = np.array(list(names) + [UNKNOWN_AREA], dtype=object)
+        self._unknown = len(names)
+        self.max_distance_km = max_distance_km
+        self.polygons = polygons
+        self.nearest_fallback = nearest_fallback
+
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        # Equirectangular projection around the city keeps distances in km
+        self._lat0 = float(lats.mean())
+        self._lon_scale = math.cos(math.radians(self._lat0)) * KM_PER_DEGREE
+        self._x, self._y = self._project(lats, lons)
+
+        self._polygon_bboxes = None
+        if polygons is not None:
+            self._polygon_bboxes = np.array([
+                [min(r[:, 0].min() for r in rings), min(r[:, 1].min() for r in rings),
+                 max(r[:, 0].max() for r in rings), max(r[:, 1].max() for r in rings)]
+                for rings in polygons
+            ])
+
+        self._build_grid(cell_km)
+        if polygons is not None:
+            self._build_polygon_grid()
+
+    @classmethod
+    def from_csv(cls, path: str = AREA_CENTROIDS_PATH, **kwargs) -> 'AreaIndex':
+        """Build the index from a CSV with Area, Latitude and Longitude columns."""
+        areas = pd.read_csv(path)
+        return cls(areas['Area'].tolist(), areas['Latitude'].to_numpy(), areas['Longitude'].to_numpy(), **kwargs)
+
+    @classmethod
+    def from_geojson(cls, path: str = AREA_POLYGONS_PATH, **kwargs) -> 'AreaIndex':
+        """Build the index from Polygon/MultiPolygon features with a "name" property."""
+        with open(path) as f:
+            features = json.load(f)['features']
+        names, lats, lons, polygons = [], [], [], []
+        for feature in features:
+            geometry = feature['geometry']
+            if geometry['type'] == 'Polygon':
+                parts = [geometry['coordinates']]
+            elif geometry['type'] == 'MultiPolygon':
+                parts = geometry['coordinates']
+            else:
+                continue
+            rings = [np.asarray(ring, dtype=float)[:, :2] for part in parts for ring in part]
+            outer = np.vstack([np.asarray(part[0], dtype=float)[:, :2] for part in parts])
+            properties = feature.get('properties') or {}
+            names.append(properties.get('name', properties.get('Area', UNKNOWN_AREA)))
+            lons.append(outer[:, 0].mean())
+            lats.append(outer[:, 1].mean())
+            polygons.append(rings)
+        kwargs.setdefault('cell_km', POLYGON_CELL_KM)
+        return cls(names, lats, lons, polygons=polygons, **kwargs)
+
+    def lookup(self, lat: float, lon: float) -> str:
+        """Area name for a single point."""
+        return self.lookup_many([lat], [lon])[0]
+
+    def lookup_many(self, lats: Sequence[float], lons: Sequence[float]) -> np.ndarray:
+        """Area names for many points at once, as an object array."""
+        return self.names[self.lookup_indices(lats, lons)]
+
+    def lookup_indices(self, lats: Sequence[float], lons: Sequence[float]) -> np.ndarray:
+        """Index into `names` for every point; `len(names) - 1` means unknown."""
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        if self.polygons is None:
+            return self._nearest_centroid(lats, lons)
+        result = self._polygon_containing(lats, lons)
+        outside = result < 0
+        if self.nearest_fallback and outside.any():
+            result[outside] = self._nearest_centroid(lats[outside], lons[outside])
+        else:
+            result[outside] = self._unknown
+        return result
+
+    def _project(self, lats, lons):
+        return (lons * self._lon_scale, (lats - self._lat0) * KM_PER_DEGREE)
+
+    def _build_grid(self, cell_km):
+        bbox = DEHRADUN_BOUNDING_BOX
+        bx, by = self._project(np.array([bbox['min_lat'], bbox['max_lat']]),
+                               np.array([bbox['min_lon'], bbox['max_lon']]))
+        self._x0 = min(bx.min(), self._x.min())
+        self._y0 = min(by.min(), self._y.min())
+        self._cell = cell_km
+        self._nx = int(math.ceil((max(bx.max(), self._x.max()) - self._x0) / cell_km)) + 1
+        self._ny = int(math.ceil((max(by.max(), self._y.max()) - self._y0) / cell_km)) + 1
+
+        # Distance from every cell to every centroid: nearest and farthest
+        # point of the cell. A centroid can own part of the cell only if its
+        # nearest distance beats the best farthest distance.
+        half = cell_km / 2
+        cx = self._x0 + (np.arange(self._nx) + 0.5) * cell_km
+        cy = self._y0 + (np.arange(self._ny) + 0.5) * cell_km
+        cx, cy = np.meshgrid(cx, cy)
+        dx = np.abs(cx.ravel()[:, None] - self._x[None, :])
+        dy = np.abs(cy.ravel()[:, None] - self._y[None, :])
+        near = np.hypot(np.maximum(dx - half, 0), np.maximum(dy - half, 0))
+        far = np.hypot(dx + half, dy + half)
+        candidate = near <= far.min(axis=1, keepdims=True)
+
+        # Pack candidates into a dense (cells, M) array, padding each row with
+        # its first candidate so argmin needs no masking
+        counts = candidate.sum(axis=1)
+        order = np.argsort(~candidate, axis=1, kind='stable')[:, :counts.max()]
+        pad = np.arange(order.shape[1])[None, :] >= counts[:, None]
+        order[pad] = np.broadcast_to(order[:, :1], order.shape)[pad]
+        self._candidates = order
+
+    def _build_polygon_grid(self):
+        # Every ring edge as (lon_i, lat_i, lon_j, lat_j), grouped by polygon:
+        # the edges of polygon i are _edges[_edge_starts[i]:_edge_starts[i + 1]]
+        edges = [np.column_stack([ring[:, 0], ring[:, 1], np.roll(ring[:, 0], 1), np.roll(ring[:, 1], 1)])
+                 for rings in self.polygons for ring in rings]
+        self._edges = np.vstack(edges)
+        edge_counts = [sum(len(ring) for ring in rings) for rings in self.polygons]
+        self._edge_starts = np.concatenate([[0], np.cumsum(edge_counts)])
+        edge_polygons = np.repeat(np.arange(len(self.polygons)), edge_counts)
+
+        # One entry per (cell, polygon) for every cell the polygon's bounding
+        # box overlaps, sorted by cell: the entries of cell c are
+        # _cell_starts[c]:_cell_starts[c + 1]
+        boxes = self._polygon_bboxes
+        owners, cells = self._cells_overlapping(boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3])
+        order = np.lexsort((owners, cells))
+        cells, self._entry_polygons = cells[order], owners[order]
+        self._cell_starts = np.concatenate([[0], np.cumsum(np.bincount(cells, minlength=self._nx * self._ny))])
+
+        # Per entry, the edges of its polygon that can touch the cell
+        lon0 = np.minimum(self._edges[:, 0], self._edges[:, 2])
+        lon1 = np.maximum(self._edges[:, 0], self._edges[:, 2])
+        lat0 = np.minimum(self._edges[:, 1], self._edges[:, 3])
+        lat1 = np.maximum(self._edges[:, 1], self._edges[:, 3])
+        edge_ids, edge_cells = self._cells_overlapping(lon0, lat0, lon1, lat1)
+        entry_keys = cells * len(self.polygons) + self._entry_polygons
+        edge_entries = np.searchsorted(entry_keys, edge_cells * len(self.polygons) + edge_polygons[edge_ids])
+        order = np.argsort(edge_entries, kind='stable')
+        self._entry_edge_starts = np.concatenate([[0], np.cumsum(np.bincount(edge_entries, minlength=len(cells)))])
+
+        # A reference point per cell, set off from the centre so it is
+        # unlikely to sit exactly on a grid-aligned boundary, and whether it
+        # lies inside each entry's polygon
+        iy, ix = np.divmod(cells, self._nx)
+        self._entry_ref_x = self._x0 + (ix + 0.5 + REFERENCE_OFFSET[0]) * self._cell
+        self._entry_ref_y = self._y0 + (iy + 0.5 + REFERENCE_OFFSET[1]) * self._cell
+        ref_lons = self._entry_ref_x / self._lon_scale
+        ref_lats = self._entry_ref_y / KM_PER_DEGREE + self._lat0
+        self._entry_ref_inside = self._ray_cast(ref_lons, ref_lats, self._entry_polygons)
+
+        # The edges themselves, in entry order and projected to km, as
+        # rows (x, y, dx, dy) of start point and direction, plus which side
+        # of each edge's line the entry's reference point is on
+        ax, ay = self._project(self._edges[:, 1], self._edges[:, 0])
+        bx, by = self._project(self._edges[:, 3], self._edges[:, 2])
+        edge_ids = edge_ids[order]
+        self._entry_edges = np.vstack([ax[edge_ids], ay[edge_ids], (bx - ax)[edge_ids], (by - ay)[edge_ids]])
+        x, y, dx, dy = self._entry_edges
+        ref = np.repeat(np.arange(len(cells)), np.diff(self._entry_edge_starts))
+        self._entry_edge_ref_left = dx * (self._entry_ref_y[ref] - y) - dy * (self._entry_ref_x[ref] - x) > 0
+
+    def _cells_overlapping(self, min_lons, min_lats, max_lons, max_lats):
+        """(box index, cell) for every grid cell each lon/lat box overlaps, clipped to the grid."""
+        x0, y0 = self._project(np.asarray(min_lats), np.asarray(min_lons))
+        x1, y1 = self._project(np.asarray(max_lats), np.asarray(max_lons))
+        ix0 = np.clip(np.floor((x0 - self._x0) / self._cell).astype(np.int64), 0, self._nx - 1)
+        ix1 = np.clip(np.floor((x1 - self._x0) / self._cell).astype(np.int64), 0, self._nx - 1)
+        iy0 = np.clip(np.floor((y0 - self._y0) / self._cell).astype(np.int64), 0, self._ny - 1)
+        iy1 = np.clip(np.floor((y1 - self._y0) / self._cell).astype(np.int64), 0, self._ny - 1)
+        width = ix1 - ix0 + 1
+        owners, offsets = _expand(np.zeros(len(ix0), dtype=np.int64), width * (iy1 - iy0 + 1))
+        row, col = np.divmod(offsets, width[owners])
+        return owners, (iy0[owners] + row) * self._nx + ix0[owners] + col
+
+    def _cells(self, lats, lons):
+        """Grid cell of every point and whether it lies inside the grid at all."""
+        x, y = self._project(lats, lons)
+        ix = np.floor((x - self._x0) / self._cell).astype(np.int64)
+        iy = np.floor((y - self._y0) / self._cell).astype(np.int64)
+        in_grid = (ix >= 0) & (ix < self._nx) & (iy >= 0) & (iy < self._ny)
+        return iy * self._nx + ix, in_grid, x, y
+
+    def _nearest_centroid(self, lats, lons):
+        cells, in_grid, x, y = self._cells(lats, lons)
+
+        result = np.full(len(x), self._unknown, dtype=np.int64)
+        distance = np.full(len(x), np.inf)
+
+        if in_grid.any():
+            cand = self._candidates[cells[in_grid]]
+            d2 = (x[in_grid, None] - self._x[cand]) ** 2 + (y[in_grid, None] - self._y[cand]) ** 2
+            best = np.argmin(d2, axis=1)
+            rows = np.arange(len(cand))
+            result[in_grid] = cand[rows, best]
+            distance[in_grid] = np.sqrt(d2[rows, best])
+
+        outside = ~in_grid
+        if outside.any():
+            d2 = (x[outside, None] - self._x[None, :]) ** 2 + (y[outside, None] - self._y[None, :]) ** 2
+            best = np.argmin(d2, axis=1)
+            result[outside] = best
+            distance[outside] = np.sqrt(d2[np.arange(len(best)), best])
+
+        if self.max_distance_km is not None:
+            result[distance > self.max_distance_km] = self._unknown
+        return result
+
+    def _polygon_containing(self, lats, lons):
+        cells, in_grid, px, py = self._cells(lats, lons)
+        points = np.flatnonzero(in_grid)
+        starts = self._cell_starts[cells[points]]
+        pair_points, entries = _expand(starts, self._cell_starts[cells[points] + 1] - starts)
+        pair_points = points[pair_points]
+        pair_polygons = self._entry_polygons[entries]
+
+        # A point is inside when its cell's reference point is, unless the
+        # segment between them crosses the boundary an odd number of times.
+        # Only edges touching the cell can cross it, usually a handful.
+        edge_starts = self._entry_edge_starts[entries]
+        pairs, slots = _expand(edge_starts, self._entry_edge_starts[entries + 1] - edge_starts)
+        x, y, dx, dy = self._entry_edges[:, slots]
+        point_ids = pair_points[pairs]
+        qx, qy = px[point_ids], py[point_ids]
+        # Point and reference on opposite sides of the edge's line ...
+        crosses = (dx * (qy - y) - dy * (qx - x) > 0) != self._entry_edge_ref_left[slots]
+        # ... and the edge's ends on opposite sides of the segment's line
+        candidates = np.flatnonzero(crosses)
+        x, y, dx, dy = x[candidates], y[candidates], dx[candidates], dy[candidates]
+        qx, qy = qx[candidates], qy[candidates]
+        ref = entries[pairs[candidates]]
+        sx, sy = self._entry_ref_x[ref] - qx, self._entry_ref_y[ref] - qy
+        start_turn = sx * (y - qy) - sy * (x - qx)
+        end_turn = start_turn + sx * dy - sy * dx
+        crosses[candidates] = (start_turn > 0) != (end_turn > 0)
+        parity = np.bincount(pairs, weights=crosses, minlength=len(pair_points)) % 2 == 1
+        inside = self._entry_ref_inside[entries] != parity
+
+        # Points outside the grid are rare; ray cast them against every polygon
+        # whose bounding box holds them
+        outside = np.flatnonzero(~in_grid)
+        if len(outside):
+            candidates = np.repeat(outside, len(self.polygons))
+            polygons = np.tile(np.arange(len(self.polygons)), len(outside))
+            bbox = self._polygon_bboxes[polygons]
+            keep = ((lons[candidates] >= bbox[:, 0]) & (lats[candidates] >= bbox[:, 1]) &
+                    (lons[candidates] <= bbox[:, 2]) & (lats[candidates] <= bbox[:, 3]))
+            candidates, polygons = candidates[keep], polygons[keep]
+            pair_points = np.concatenate([pair_points, candidates])
+            pair_polygons = np.concatenate([pair_polygons, polygons])
+            inside = np.concatenate([inside, self._ray_cast(lons[candidates], lats[candidates], polygons)])
+
+        # Overlapping polygons: the lowest index wins
+        best = np.full(len(lats), len(self.polygons), dtype=np.int64)
+        np.minimum.at(best, pair_points[inside], pair_polygons[inside])
+        return np.where(best < len(self.polygons), best, -1)
+
+    def _ray_cast(self, px, py, polygons):
+        """Even-odd ray casting of each point against all edges (holes included) of its polygon."""
+        first = self._edge_starts[polygons]
+        pairs, edges = _expand(first, self._edge_starts[polygons + 1] - first)
+        xi, yi, xj, yj = self._edges[edges].T
+        x, y = px[pairs], py[pairs]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            hit = ((yi > y) != (yj > y)) & (x < (xj - xi) * (y - yi) / (yj - yi) + xi)
+        return np.bincount(pairs, weights=hit, minlength=len(px)) % 2 == 1
+
+
+def _expand(starts: np.ndarray, counts: np.ndarray):
+    """
+    Flatten ranges `starts[k]:starts[k] + counts[k]` into (k, value) arrays
+    without a Python loop.
+    """
+    owners = np.repeat(np.arange(len(counts)), counts)
+    shifts = np.asarray(starts) - (np.cumsum(counts) - counts)
+    return owners, np.arange(len(owners)) + shifts[owners]
+
+
+
+# Same attributes as the geopy Location fields the app reads
+AreaLocation = namedtuple('AreaLocation', ['address', 'latitude', 'longitude'])
+
+
+class AreaGeocoder:
+    """
+    Offline forward geocoder over the area centroid table, with the same
+    `geocode(query)` call as geopy's Nominatim. Only known area names resolve;
+    anything after the first comma ("..., Dehradun") is ignored.
+    """
+
+    def __init__(self, path: str = AREA_CENTROIDS_PATH):
+        areas = pd.read_csv(path)
+        self._areas = {
+            name.strip().lower(): AreaLocation(name, float(lat), float(lon))
+            for name, lat, lon in zip(areas['Area'], areas['Latitude'], areas['Longitude'])
+        }
+
+    def geocode(self, query: str, *args, **kwargs) -> Optional[AreaLocation]:
+        return self._areas.get(query.split(',')[0].strip().lower())
+
+
+def load_area_index(centroids_path: str = AREA_CENTROIDS_PATH,
+                    polygons_path: str = AREA_POLYGONS_PATH) -> AreaIndex:
+    """Area index from the configured polygons if set, otherwise from centroids."""
+    if polygons_path:
+        return AreaIndex.from_geojson(polygons_path)
+    return AreaIndex.from_csv(centroids_path)
@@ -0,0 +1,376 @@
+"""
+Offline benchmark suite for the routing hot paths.
+
+Generates synthetic Dehradun-like road graphs and origin/destination query
+sets, times each stage and writes the results as JSON so runs from different
+commits can be compared:
+
+    python benchmark.py --sizes 1000 10000 --output bench.json
+    python benchmark.py --sizes 1000 10000 --compare bench.json
+
+No network access is needed; geocoding is replaced by `OfflineGeocoder`.
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from routing import Graph, dijkstra, a_star, bidirectional_a_star, find_nearest_node, haversine
+# data_processor reports progress with print(); keep stdout clean for the JSON
+with contextlib.redirect_stdout(sys.stderr):
+    from data_processor import CrimeDataProcessor
+from safety import calculate_safety_score
+from area_lookup import load_area_index
+from landmarks import Landmarks
+from src.config.config import DEHRADUN_BOUNDING_BOX, CRIME_WEIGHTS
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+# Roughly how much slower a call runs under tracemalloc
+TRACEMALLOC_SLOWDOWN = 5
+AREAS = [
+    "Rajpur Road", "Clock Tower", "ISBT", "Ballupur", "Prem Nagar", "Raipur",
+    "Dalanwala", "Patel Nagar", "Clement Town", "Sahastradhara Road",
+    "Jakhan", "Vasant Vihar", "Karanpur", "Race Course", "Doiwala"
+]
+
+
+class OfflineGeocoder:
+    """Deterministic stand-in for Nominatim that never touches the network."""
+
+    class _Location:
+        def __init__(self, latitude, longitude, address):
+            self.latitude = latitude
+            self.longitude = longitude
+            self.raw = {'address': address}
+
+    def geocode(self, query, *args, **kwargs):
+        rng = random.Random(query)
+        bbox = DEHRADUN_BOUNDING_BOX
+        return self._Location(
+            rng.uniform(bbox['min_lat'], bbox['max_lat']),
+            rng.uniform(bbox['min_lon'], bbox['max_lon']),
+            {'city': 'Dehradun', 'suburb': query.split(',')[0]}
+        )
+
+
+def generate_edges(num_edges: int, seed: int = 0) -> List[tuple]:
+    """
+    Build a jittered grid over the Dehradun bounding box with about
+    `num_edges` undirected edges, returned as (u, v, weight_km, safety_score).
+    """
+    rng = random.Random(seed)
+    bbox = DEHRADUN_BOUNDING_BOX
+    side = max(2, math.ceil(math.sqrt(num_edges / 2)))
+    lat_step = (bbox['max_lat'] - bbox['min_lat']) / side
+    lon_step = (bbox['max_lon'] - bbox['min_lon']) / side
+
+    nodes = [
+        [(round(bbox['min_lat'] + (i + rng.uniform(0.1, 0.9)) * lat_step, 6),
+          round(bbox['min_lon'] + (j + rng.uniform(0.1, 0.9)) * lon_step, 6))
+         for j in range(side)]
+        for i in range(side)
+    ]
+
+    edges = []
+    for i in range(side):
+        for j in range(side):
+            for di, dj in ((0, 1), (1, 0)):
+                if len(edges) >= num_edges:
+                    return edges
+                ni, nj = i + di, j + dj
+                if ni >= side or nj >= side:
+                    continue
+                u, v = nodes[i][j], nodes[ni][nj]
+                # Roads are never straight; stretch the geodesic a little
+                weight = haversine(u, v) * rng.uniform(1.05, 1.6)
+                edges.append((u, v, weight, rng.uniform(40, 100)))
+    return edges
+
+
+def build_graph(edges: List[tuple]) -> Graph:
+    graph = Graph()
+    for u, v, weight, safety_score in edges:
+        graph.add_edge(u, v, weight, safety_score)
+    return graph
+
+
+def generate_queries(nodes: List[tuple], count: int, seed: int = 0) -> List[tuple]:
+    rng = random.Random(seed)
+    return [(rng.choice(nodes), rng.choice(nodes)) for _ in range(count)]
+
+
+def generate_points(count: int, seed: int = 0) -> List[tuple]:
+    rng = random.Random(seed)
+    bbox = DEHRADUN_BOUNDING_BOX
+    return [(rng.uniform(bbox['min_lat'], bbox['max_lat']),
+             rng.uniform(bbox['min_lon'], bbox['max_lon'])) for _ in range(count)]
+
+
+def generate_crime_data(num_rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = random.Random(seed)
+    crime_types = list(CRIME_WEIGHTS)
+    return pd.DataFrame({
+        'Case_ID': [f"C{i:07d}" for i in range(num_rows)],
+        'Crime_Type': [rng.choice(crime_types) for _ in range(num_rows)],
+        'Location': [rng.choice(AREAS) for _ in range(num_rows)],
+        'Police_Station': [rng.choice(AREAS) for _ in range(num_rows)],
+    })
+
+
+def process_peak_rss_mb() -> Optional[float]:
+    """High-water mark of the whole process so far, not of any one stage."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = math.floor(k)
+    hi = math.ceil(k)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def peak_alloc_mb(fn, args: tuple, untraced_seconds: float = 0.0,
+                  max_seconds: float = math.inf) -> Optional[float]:
+    """
+    Peak memory allocated while running `fn(*args)` once, in MB. Runs
+    separately from the timed calls because tracing allocations slows them.
+    Returns None without running when a call that took `untraced_seconds`
+    would likely overrun `max_seconds` once traced.
+    """
+    if untraced_seconds * TRACEMALLOC_SLOWDOWN > max_seconds:
+        return None
+    tracemalloc.start()
+    try:
+        fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def summarize(latencies: List[float], items: int = 1, peak_mb: Optional[float] = None) -> Dict[str, float]:
+    """
+    Latency percentiles in milliseconds plus throughput in items per second
+    and the stage's own peak allocation.
+    """
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    if not ordered:
+        return {'count': 0, 'peak_alloc_mb': peak_mb}
+    return {
+        'count': len(ordered),
+        'p50_ms': percentile(ordered, 50) * 1000,
+        'p95_ms': percentile(ordered, 95) * 1000,
+        'p99_ms': percentile(ordered, 99) * 1000,
+        'mean_ms': total / len(ordered) * 1000,
+        'throughput_per_s': len(ordered) * items / total if total else None,
+        'peak_alloc_mb': peak_mb,
+    }
+
+
+def time_calls(fn, calls: List[tuple], max_seconds: float) -> List[float]:
+    """Time `fn(*args)` for each entry in `calls`, stopping once `max_seconds` is spent."""
+    latencies = []
+    budget_end = time.perf_counter() + max_seconds
+    for args in calls:
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - start)
+        if time.perf_counter() > budget_end:
+            break
+    return latencies
+
+
+def measure(fn, calls: List[tuple], max_seconds: float, items: int = 1) -> Dict[str, float]:
+    """`time_calls` plus the peak allocation of one untimed call, summarized."""
+    latencies = time_calls(fn, calls, max_seconds)
+    peak_mb = peak_alloc_mb(fn, calls[0], latencies[0], max_seconds) if calls else None
+    return summarize(latencies, items, peak_mb)
+
+
+def bench_graph(num_edges: int, num_queries: int, seed: int, safety_threshold: int,
+                max_seconds: float) -> Dict[str, dict]:
+    edges = generate_edges(num_edges, seed)
+
+    start = time.perf_counter()
+    graph = build_graph(edges)
+    build_time = time.perf_counter() - start
+
+    nodes = list(graph.graph)
+    queries = generate_queries(nodes, num_queries, seed)
+    points = generate_points(num_queries, seed)
+
+    start = time.perf_counter()
+    landmarks = Landmarks.build(graph)
+    landmark_time = time.perf_counter() - start
+
+    stages = {
+        'graph_construction': summarize(
+            [build_time], len(edges), peak_alloc_mb(build_graph, (edges,), build_time, max_seconds)),
+        'find_nearest_node': measure(find_nearest_node, [(graph, p) for p in points], max_seconds),
+        'dijkstra': measure(dijkstra, [(graph, s, e, safety_threshold) for s, e in queries], max_seconds),
+        'a_star': measure(a_star, [(graph, s, e, safety_threshold) for s, e in queries], max_seconds),
+        'landmark_build': summarize(
+            [landmark_time], len(nodes), peak_alloc_mb(Landmarks.build, (graph,), landmark_time, max_seconds)),
+        'a_star_landmarks': measure(
+            a_star, [(graph, s, e, safety_threshold, landmarks) for s, e in queries], max_seconds),
+        'bidirectional_a_star_landmarks': measure(
+            bidirectional_a_star, [(graph, s, e, safety_threshold, landmarks) for s, e in queries], max_seconds),
+    }
+    return {
+        'edges': len(edges),
+        'nodes': len(nodes),
+        'stages': stages,
+        'process_peak_rss_mb': process_peak_rss_mb(),
+    }
+
+
+def bench_crime_data(num_rows: int, num_queries: int, seed: int, max_seconds: float) -> Dict[str, dict]:
+    crime_data = generate_crime_data(num_rows, seed)
+
+    rng = random.Random(seed)
+    safety_calls = [(rng.choice(AREAS), crime_data) for _ in range(num_queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'crime.csv')
+        crime_data.to_csv(path, index=False)
+
+        geolocator = OfflineGeocoder()
+        area_index = load_area_index()
+        load_stats = measure(CrimeDataProcessor, [(path, geolocator, area_index)] * 5, max_seconds, items=num_rows)
+
+    return {
+        'rows': num_rows,
+        'stages': {
+            'calculate_safety_score': measure(calculate_safety_score, safety_calls, max_seconds),
+            'load_crime_data': load_stats,
+        },
+        'process_peak_rss_mb': process_peak_rss_mb(),
+    }
+
+
+def bench_area_lookup(batch_size: int, num_queries: int, seed: int, max_seconds: float) -> Dict[str, dict]:
+    index = load_area_index()
+    batches = []
+    for i in range(num_queries):
+        points = generate_points(batch_size, seed + i)
+        batches.append(([p[0] for p in points], [p[1] for p in points]))
+    return {
+        'batch_size': batch_size,
+        'stages': {
+            'area_lookup_batch': measure(index.lookup_many, batches, max_seconds, items=batch_size),
+        },
+        'process_peak_rss_mb': process_peak_rss_mb(),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def run(sizes: List[int], num_queries: int = 100, crime_rows: int = 10000, seed: int = 0,
+        safety_threshold: int = 50, max_seconds: float = 30.0) -> dict:
+    results = {
+        'metadata': {
+            'timestamp': datetime.now().isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'queries': num_queries,
+            'safety_threshold': safety_threshold,
+            'max_seconds_per_stage': max_seconds,
+        },
+        'graphs': [],
+    }
+    for size in sizes:
+        print(f"Benchmarking graph with {size} edges", file=sys.stderr)
+        results['graphs'].append(bench_graph(size, num_queries, seed, safety_threshold, max_seconds))
+    print(f"Benchmarking crime data with {crime_rows} rows", file=sys.stderr)
+    results['crime_data'] = bench_crime_data(crime_rows, num_queries, seed, max_seconds)
+    results['area_lookup'] = bench_area_lookup(10000, num_queries, seed, max_seconds)
+    return results
+
+
+def compare(current: dict, baseline: dict) -> List[str]:
+    """Describe the p50 change of every stage present in both result sets."""
+    def stages(results):
+        found = {}
+        for graph in results.get('graphs', []):
+            for name, stats in graph['stages'].items():
+                found[f"{graph['edges']} edges / {name}"] = stats
+        for section in ('crime_data', 'area_lookup'):
+            for name, stats in results.get(section, {}).get('stages', {}).items():
+                found[f"{section} / {name}"] = stats
+        return found
+
+    old = stages(baseline)
+    lines = []
+    for name, stats in stages(current).items():
+        if not old.get(name, {}).get('p50_ms') or 'p50_ms' not in stats:
+            continue
+        change = (stats['p50_ms'] / old[name]['p50_ms'] - 1) * 100
+        lines.append(f"{name}: p50 {old[name]['p50_ms']:.3f} ms -> {stats['p50_ms']:.3f} ms ({change:+.1f}%)")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark routing, snapping, scoring and data loading")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Number of edges in each synthetic graph")
+    parser.add_argument('--queries', type=int, default=100, help="Queries per stage")
+    parser.add_argument('--crime-rows', type=int, default=10000, help="Rows of synthetic crime data")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--safety-threshold', type=int, default=50)
+    parser.add_argument('--max-seconds', type=float, default=30.0,
+                        help="Time budget per stage; remaining queries are skipped, as is the "
+                             "traced allocation run of a stage that would overrun it")
+    parser.add_argument('--output', help="Write JSON results to this file instead of stdout")
+    parser.add_argument('--compare', help="Baseline JSON file to compare against")
+    args = parser.parse_args(argv)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run(args.sizes, args.queries, args.crime_rows, args.seed,
+                      args.safety_threshold, args.max_seconds)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for line in compare(results, baseline):
+            print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
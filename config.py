@@ -52,13 +52,50 @@ CRIME_WEIGHTS: Dict[str, int] = {
     "Drug Possession": 3
 }
 
+# Accident Severity Weights (same scale as crime weights)
+ACCIDENT_SEVERITY_WEIGHTS: Dict[str, int] = {
+    "Severe": 10,
+    "Moderate": 6,
+    "Minor": 3
+}
+
 # Route Settings
 MAX_ROUTE_DISTANCE: float = float(os.getenv('MAX_ROUTE_DISTANCE', 50.0))  # kilometers
+MAX_DELIVERY_STOPS: int = int(os.getenv('MAX_DELIVERY_STOPS', 40))
+ROUTE_OPTIMIZER_TIME_LIMIT: float = float(os.getenv('ROUTE_OPTIMIZER_TIME_LIMIT', 2.0))  # seconds
+ISOCHRONE_SECTORS: int = int(os.getenv('ISOCHRONE_SECTORS', 36))
+ISOCHRONE_WORKERS: int = int(os.getenv('ISOCHRONE_WORKERS', os.cpu_count() or 1))
+LANDMARK_COUNT: int = int(os.getenv('LANDMARK_COUNT', 8))
+LANDMARKS_PATH: str = os.getenv('LANDMARKS_PATH', 'landmarks.npz')
+
+# Routing Provider Settings
+ROUTING_PROVIDER: str = os.getenv('ROUTING_PROVIDER', 'ors')  # 'ors' or 'local'
+ROUTING_TIMEOUT: int = int(os.getenv('ROUTING_TIMEOUT', 15))  # seconds
+ROUTING_MAX_CONCURRENT: int = int(os.getenv('ROUTING_MAX_CONCURRENT', 4))
+ORS_POOL_SIZE: int = int(os.getenv('ORS_POOL_SIZE', 10))
+LOCAL_ROUTING_LATENCY: float = float(os.getenv('LOCAL_ROUTING_LATENCY', 0.0))  # seconds
+LOCAL_ROUTING_SPEED: float = float(os.getenv('LOCAL_ROUTING_SPEED', 30.0))  # km/h
 
 # Geocoding Settings
 GEOCODER_USER_AGENT: str = os.getenv('GEOCODER_USER_AGENT', 'route_planner')
 GEOCODER_TIMEOUT: int = int(os.getenv('GEOCODER_TIMEOUT', 10))
 
+# Area Lookup Settings
+AREA_CENTROIDS_PATH: str = os.getenv('AREA_CENTROIDS_PATH', 'dehradun_areas.csv')
+AREA_POLYGONS_PATH: str = os.getenv('AREA_POLYGONS_PATH', '')  # GeoJSON, overrides centroids when set
+AREA_MAX_DISTANCE_KM: float = float(os.getenv('AREA_MAX_DISTANCE_KM', 5.0))
+
+# Emergency Facility Settings
+FACILITIES_PATH: str = os.getenv('FACILITIES_PATH', 'dehradun_facilities.csv')
+CRIME_DATA_PATH: str = os.getenv('CRIME_DATA_PATH', 'dehradun_crime_synthetic_data.csv')
+ACCIDENT_DATA_PATH: str = os.getenv('ACCIDENT_DATA_PATH', 'dehradun_accident_data.csv')
+
+# Risk Heatmap Tile Settings
+RISK_TILES_DIR: str = os.getenv('RISK_TILES_DIR', 'risk_tiles')
+RISK_TILES_URL: Optional[str] = os.getenv('RISK_TILES_URL')  # e.g. http://localhost:8765/{z}/{x}/{y}.png
+RISK_TILES_MIN_ZOOM: int = int(os.getenv('RISK_TILES_MIN_ZOOM', 10))
+RISK_TILES_MAX_ZOOM: int = int(os.getenv('RISK_TILES_MAX_ZOOM', 15))
+
 # Cache Settings
 CACHE_ENABLED: bool = os.getenv('CACHE_ENABLED', 'True').lower() == 'true'
 CACHE_TIMEOUT: int = int(os.getenv('CACHE_TIMEOUT', 3600))  # seconds
@@ -67,6 +104,11 @@ CACHE_MAX_SIZE: int = int(os.getenv('CACHE_MAX_SIZE', 1000))
 # Logging Settings
 LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO')
 LOG_FILE: str = os.getenv('LOG_FILE', 'route_planner.log')
+
+# Tracing Settings
+TRACING_ENABLED: bool = os.getenv('TRACING_ENABLED', 'False').lower() == 'true'
+METRICS_FILE: str = os.getenv('METRICS_FILE', '')  # Prometheus text file, empty to disable
+METRICS_PORT: int = int(os.getenv('METRICS_PORT', 0))  # /metrics HTTP port, 0 to disable
 # Safety Score Weights
 SAFETY_SCORE_WEIGHTS = {
     "weather": 30,
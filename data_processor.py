@@ -3,10 +3,12 @@ import numpy as np
 from geopy.geocoders import Nominatim
 from datetime import datetime
 import json
+from area_lookup import load_area_index, UNKNOWN_AREA
 
 class CrimeDataProcessor:
-    def __init__(self, crime_data_path):
-        self.geolocator = Nominatim(user_agent="route_planner")
+    def __init__(self, crime_data_path, geolocator=None, area_index=None):
+        self.geolocator = geolocator if geolocator is not None else Nominatim(user_agent="route_planner")
+        self.area_index = area_index if area_index is not None else load_area_index()
         self.crime_data = None
         self.city_stats = {}
         self._load_crime_data(crime_data_path)
@@ -19,7 +21,7 @@ class CrimeDataProcessor:
             
             # Calculate crime statistics for each city
             for _, row in self.crime_data.iterrows():
-                city = row['Area']
+                city = row['Location']
                 if city not in self.city_stats:
                     self.city_stats[city] = {
                         'total_crimes': 0,
@@ -35,7 +37,7 @@ class CrimeDataProcessor:
                         }
                     }
                 
-                crime_type = row['Crime Type']
+                crime_type = row['Crime_Type']
                 if crime_type in self.city_stats[city]['crime_types']:
                     self.city_stats[city]['crime_types'][crime_type] += 1
                     self.city_stats[city]['total_crimes'] += 1
@@ -137,16 +139,13 @@ class CrimeDataProcessor:
             # Get route coordinates
             coords = route['features'][0]['geometry']['coordinates'][0]
             
-            # Get city name from coordinates
-            location = self.geolocator.reverse(f"{coords[1]}, {coords[0]}")
-            if not location:
+            # Get area name from coordinates
+            city = self.area_index.lookup(coords[1], coords[0])
+            if city == UNKNOWN_AREA:
                 return {
                     'risk_percentage': 50,
                     'city': 'Unknown'
                 }
-                
-            # Extract city name
-            city = location.raw['address'].get('city', location.raw['address'].get('town', 'Unknown'))
             
             # Get crime statistics for the city
             city_data = self.get_city_crime_rate(city)
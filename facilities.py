@@ -0,0 +1,122 @@
+"""
+Nearest emergency facility lookup over the road `Graph`.
+
+One multi-source Dijkstra per facility type labels every graph node with its
+closest facility of that type and the road distance to it. The labels are kept
+in flat numpy arrays indexed by node, so looking up the nearest hospital,
+police station or fire station from any node on a route is a constant-time
+array read instead of a search.
+"""
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import tracing
+from routing import multi_source_dijkstra, find_nearest_node, haversine
+from src.config.config import (
+    FACILITIES_PATH,
+    CRIME_DATA_PATH,
+    AREA_CENTROIDS_PATH,
+    DEFAULT_SAFETY_THRESHOLD
+)
+
+# Facility type -> display name
+FACILITY_TYPES = {'hospital': "Hospital", 'police': "Police Station", 'fire_station': "Fire Station"}
+
+logger = logging.getLogger('route_planner')
+
+
+def load_facilities(path: str = FACILITIES_PATH, crime_data_path: str = CRIME_DATA_PATH,
+                    centroids_path: str = AREA_CENTROIDS_PATH) -> pd.DataFrame:
+    """
+    Facilities with Name, Type, Latitude and Longitude columns. Hospitals and
+    fire stations come from `path`; police stations are the `Police_Station`
+    values of the crime data, placed at their area centroid.
+    """
+    facilities = pd.read_csv(path)
+    centroids = pd.read_csv(centroids_path).set_index('Area')
+    stations = pd.read_csv(crime_data_path)['Police_Station'].dropna().unique()
+
+    police = []
+    for station in sorted(stations):
+        if station not in centroids.index:
+            logger.warning("No coordinates for police station: %s", station)
+            continue
+        police.append({
+            'Name': f"{station} Police Station",
+            'Type': 'police',
+            'Latitude': centroids.loc[station, 'Latitude'],
+            'Longitude': centroids.loc[station, 'Longitude']
+        })
+    return pd.concat([facilities, pd.DataFrame(police)], ignore_index=True)
+
+
+class FacilityLayer:
+    def __init__(self, graph, facilities: pd.DataFrame, safety_threshold: int = DEFAULT_SAFETY_THRESHOLD):
+        """
+        Label every node of `graph` with its nearest facility of each type,
+        travelling only on edges that meet `safety_threshold`.
+        """
+        self.facilities = facilities.reset_index(drop=True)
+        self.safety_threshold = safety_threshold
+        self.nodes = list(graph.graph)
+        self.node_ids = {node: i for i, node in enumerate(self.nodes)}
+        # Per facility type: facility row of the nearest facility (-1 if
+        # unreachable) and the distance to it in km
+        self.nearest: Dict[str, np.ndarray] = {}
+        self.distance: Dict[str, np.ndarray] = {}
+
+        with tracing.span('facility_labels'):
+            for facility_type in FACILITY_TYPES:
+                group = self.facilities[self.facilities['Type'] == facility_type]
+                sources = []
+                for row_id, row in group.iterrows():
+                    coords = (row['Latitude'], row['Longitude'])
+                    node = find_nearest_node(graph, coords)
+                    if node is not None:
+                        # Start from the snap offset so far-off facilities are not favoured
+                        sources.append((node, row_id, haversine(coords, node)))
+                costs, labels = multi_source_dijkstra(graph, sources, safety_threshold)
+
+                nearest = np.full(len(self.nodes), -1, dtype=np.int32)
+                distance = np.full(len(self.nodes), np.inf, dtype=np.float32)
+                for node, cost in costs.items():
+                    i = self.node_ids[node]
+                    nearest[i] = labels[node]
+                    distance[i] = cost
+                self.nearest[facility_type] = nearest
+                self.distance[facility_type] = distance
+
+    def nearest_facility(self, node, facility_type: str) -> Optional[Dict[str, object]]:
+        """Nearest facility of `facility_type` from graph node `node`, or None if none is reachable."""
+        i = self.node_ids.get(node)
+        if i is None or facility_type not in self.nearest or self.nearest[facility_type][i] < 0:
+            return None
+        return self._describe(facility_type, i, node)
+
+    def nearest_along(self, path: List[tuple], facility_type: str) -> Optional[Dict[str, object]]:
+        """
+        Closest facility of `facility_type` from any node of `path`. The
+        returned dict also says at which route `node` to turn off.
+        """
+        if facility_type not in self.nearest:
+            return None
+        ids = np.array([self.node_ids[node] for node in path if node in self.node_ids], dtype=np.int64)
+        if len(ids) == 0:
+            return None
+        best = int(np.argmin(self.distance[facility_type][ids]))
+        if self.nearest[facility_type][ids[best]] < 0:
+            return None
+        return self._describe(facility_type, int(ids[best]), self.nodes[ids[best]])
+
+    def _describe(self, facility_type, i, node):
+        facility = self.facilities.iloc[self.nearest[facility_type][i]]
+        return {
+            'name': facility['Name'],
+            'type': facility_type,
+            'coordinates': [float(facility['Latitude']), float(facility['Longitude'])],
+            'distance': float(self.distance[facility_type][i]),
+            'node': node
+        }
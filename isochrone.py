@@ -0,0 +1,106 @@
+"""
+Safety-constrained reachability ("isochrone") queries on the road `Graph`.
+
+A single bounded Dijkstra from a depot finds every node reachable within a
+distance budget on edges that meet the safety threshold. The result comes back
+as numpy arrays and can be outlined as a simplified polygon for the map.
+Queries from many depots run in parallel worker processes.
+"""
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import tracing
+from routing import shortest_path_tree
+from src.config.config import DEFAULT_SAFETY_THRESHOLD, ISOCHRONE_SECTORS, ISOCHRONE_WORKERS
+
+
+def reachable_nodes(graph, origin, max_distance: float,
+                    safety_threshold: int = DEFAULT_SAFETY_THRESHOLD) -> Dict[str, np.ndarray]:
+    """
+    Nodes reachable from graph node `origin` within `max_distance` km.
+
+    Returns a dict of equally long arrays: `lats`, `lons` and `costs` (km),
+    ordered by increasing cost.
+    """
+    with tracing.span('isochrone'):
+        costs, _ = shortest_path_tree(graph, origin, safety_threshold, max_cost=max_distance)
+    nodes = list(costs)
+    return {
+        'lats': np.array([node[0] for node in nodes], dtype=float),
+        'lons': np.array([node[1] for node in nodes], dtype=float),
+        'costs': np.array([costs[node] for node in nodes], dtype=float),
+    }
+
+
+def reachable_polygon(origin, lats: np.ndarray, lons: np.ndarray,
+                      sectors: int = ISOCHRONE_SECTORS) -> Optional[List[List[float]]]:
+    """
+    Star-shaped outline of the reached nodes around `origin` as [lat, lon]
+    vertices: the farthest reached node in each of `sectors` equal angular
+    sectors, in angular order. The origin itself becomes a vertex wherever
+    no node is reached between two neighbouring vertices, so the outline
+    always contains it. Returns None when fewer than three vertices remain.
+    """
+    if len(lats) == 0:
+        return None
+    lat0, lon0 = origin
+    x = (lons - lon0) * math.cos(math.radians(lat0))
+    y = lats - lat0
+    radius = np.hypot(x, y)
+    angle = np.arctan2(y, x)
+    sector = ((angle + math.pi) / (2 * math.pi) * sectors).astype(np.int64) % sectors
+
+    farthest = np.full(sectors, -1.0)
+    np.maximum.at(farthest, sector, radius)
+    vertex = np.full(sectors, -1, dtype=np.int64)
+    winners = np.flatnonzero(radius == farthest[sector])
+    vertex[sector[winners]] = winners
+    occupied = np.flatnonzero((vertex >= 0) & (farthest > 0))
+
+    polygon = []
+    for k, s in enumerate(occupied):
+        i = vertex[s]
+        polygon.append([float(lats[i]), float(lons[i])])
+        following = occupied[(k + 1) % len(occupied)]
+        turn = (angle[vertex[following]] - angle[i]) % (2 * math.pi)
+        if (following - s) % sectors != 1 or turn >= math.pi:
+            polygon.append([float(lat0), float(lon0)])
+    return polygon if len(polygon) >= 3 else None
+
+
+def isochrone(graph, origin, max_distance: float, safety_threshold: int = DEFAULT_SAFETY_THRESHOLD,
+              sectors: int = ISOCHRONE_SECTORS) -> Dict[str, object]:
+    """Reachable nodes from `origin` plus their outline under the `polygon` key."""
+    reached = reachable_nodes(graph, origin, max_distance, safety_threshold)
+    reached['origin'] = origin
+    reached['polygon'] = reachable_polygon(origin, reached['lats'], reached['lons'], sectors)
+    return reached
+
+
+# Each worker process receives the graph once, not once per origin
+_worker_graph = None
+
+
+def _init_worker(graph):
+    global _worker_graph
+    _worker_graph = graph
+
+
+def _worker_isochrone(args):
+    origin, max_distance, safety_threshold, sectors = args
+    return isochrone(_worker_graph, origin, max_distance, safety_threshold, sectors)
+
+
+def isochrones(graph, origins: List[tuple], max_distance: float,
+               safety_threshold: int = DEFAULT_SAFETY_THRESHOLD, sectors: int = ISOCHRONE_SECTORS,
+               workers: int = ISOCHRONE_WORKERS) -> List[Dict[str, object]]:
+    """`isochrone` for every origin, spread over `workers` processes; results keep the origin order."""
+    jobs = [(origin, max_distance, safety_threshold, sectors) for origin in origins]
+    if workers <= 1 or len(origins) <= 1:
+        return [isochrone(graph, *job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(origins)),
+                             initializer=_init_worker, initargs=(graph,)) as executor:
+        return list(executor.map(_worker_isochrone, jobs))
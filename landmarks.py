@@ -0,0 +1,211 @@
+"""
+Landmark (ALT) lower bounds for A* on the road `Graph`.
+
+A few landmark nodes are chosen and the road distance from each landmark to
+every node is stored. By the triangle inequality, |d(L, t) - d(L, v)| is a
+lower bound on d(v, t) for every landmark L, which is much tighter than the
+straight-line distance on a network bent around rivers and hills.
+
+Distances are computed over all edges, ignoring safety scores. A search that
+skips unsafe edges only ever gets longer paths, so the same bounds stay valid
+for every safety threshold, and changes to the safety data never require a
+rebuild. Only road changes (new edges or weights) do; saved landmarks carry a
+fingerprint of the edges and weights and are rejected when it no longer
+matches.
+"""
+import hashlib
+import random
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+import tracing
+from routing import shortest_path_tree, haversine
+from src.config.config import LANDMARK_COUNT, LANDMARKS_PATH
+
+# Safety scores are never negative, so this threshold admits every edge
+ALL_EDGES = 0
+
+
+class Landmarks:
+    def __init__(self, nodes: List[tuple], landmark_ids: np.ndarray, distances: np.ndarray,
+                 fingerprint: Optional[str] = None):
+        """
+        `distances[k, i]` is the road distance in km between landmark
+        `nodes[landmark_ids[k]]` and `nodes[i]` (inf when unreachable).
+        `fingerprint` is the `graph_fingerprint` of the graph they were built on.
+        """
+        self.nodes = nodes
+        self.fingerprint = fingerprint
+        self.landmark_ids = np.asarray(landmark_ids, dtype=np.int64)
+        self.distances = np.asarray(distances, dtype=float)
+        # Per-node rows as plain Python lists; the heuristic is called once per
+        # relaxed edge and list access is much cheaper than numpy indexing
+        self._rows: Dict[tuple, List[float]] = dict(zip(nodes, self.distances.T.tolist()))
+
+    @property
+    def landmarks(self) -> List[tuple]:
+        return [self.nodes[i] for i in self.landmark_ids]
+
+    @classmethod
+    def build(cls, graph, count: int = LANDMARK_COUNT, method: str = 'avoid', seed: int = 0) -> 'Landmarks':
+        """
+        Choose `count` landmarks with `method` ('farthest' or 'avoid') and
+        compute their distance arrays.
+        """
+        if method not in ('farthest', 'avoid'):
+            raise ValueError(f"Unknown landmark selection method: {method}")
+        nodes = list(graph.graph)
+        if not nodes:
+            raise ValueError("Road graph is empty")
+        node_ids = {node: i for i, node in enumerate(nodes)}
+        rng = random.Random(seed)
+        landmark_ids: List[int] = []
+        rows: List[np.ndarray] = []
+
+        with tracing.span('landmark_build'):
+            while len(landmark_ids) < min(count, len(nodes)):
+                if method == 'farthest' or not landmark_ids:
+                    candidate = _farthest(graph, nodes, node_ids, rows, rng)
+                else:
+                    candidate = _avoid(graph, nodes, node_ids, landmark_ids, rows, rng)
+                if candidate in landmark_ids:
+                    break
+                landmark_ids.append(candidate)
+                rows.append(_distances_from(graph, nodes[candidate], nodes, node_ids))
+
+        return cls(nodes, np.array(landmark_ids), np.vstack(rows), graph_fingerprint(graph))
+
+    def save(self, path: str = LANDMARKS_PATH):
+        nodes = np.array(self.nodes, dtype=float)
+        np.savez_compressed(path, lats=nodes[:, 0], lons=nodes[:, 1],
+                            landmark_ids=self.landmark_ids, distances=self.distances,
+                            fingerprint=np.array(self.fingerprint or ''))
+
+    @classmethod
+    def load(cls, path: str = LANDMARKS_PATH, graph=None) -> Optional['Landmarks']:
+        """
+        Load landmarks saved with `save`. If `graph` is given and its nodes,
+        edges or weights differ from the ones the landmarks were built on,
+        returns None so the caller can rebuild; stale distances would
+        overestimate and make A* return longer paths.
+        """
+        with np.load(path) as data:
+            nodes = list(zip(data['lats'].tolist(), data['lons'].tolist()))
+            fingerprint = str(data['fingerprint']) if 'fingerprint' in data else None
+            if graph is not None:
+                if fingerprint != graph_fingerprint(graph) or set(nodes) != set(graph.graph):
+                    return None
+            return cls(nodes, data['landmark_ids'], data['distances'], fingerprint)
+
+    def lower_bound(self, a, b) -> float:
+        """Lower bound on the road distance between nodes `a` and `b`."""
+        return self.heuristic_to(b)(a)
+
+    def heuristic_to(self, target) -> Callable[[tuple], float]:
+        """
+        Heuristic towards `target` for A*: the best landmark bound, never
+        below the straight-line distance.
+        """
+        target_row = self._rows.get(target)
+
+        def heuristic(node):
+            best = haversine(node, target)
+            row = self._rows.get(node)
+            if row is None or target_row is None:
+                return best
+            for to_node, to_target in zip(row, target_row):
+                # inf - finite means the nodes lie in different components,
+                # so inf is a correct bound; inf - inf is nan and never wins
+                if to_node - to_target > best:
+                    best = to_node - to_target
+                elif to_target - to_node > best:
+                    best = to_target - to_node
+            return best
+
+        return heuristic
+
+
+def graph_fingerprint(graph, include_safety: bool = False) -> str:
+    """
+    Hash of every edge and its weight. Safety scores are left out unless
+    `include_safety` is set: the landmark distances do not depend on them,
+    but anything routing under a safety threshold does.
+    """
+    if include_safety:
+        rows = [(*u, *v, weight, graph.get_safety_score(u, v)) for (u, v), weight in graph.weights.items()]
+    else:
+        rows = [(*u, *v, weight) for (u, v), weight in graph.weights.items()]
+    edges = np.array(rows, dtype=float).reshape(len(rows), -1)
+    edges = edges[np.lexsort(edges.T[::-1])]
+    return hashlib.sha256(edges.tobytes()).hexdigest()
+
+
+def _distances_from(graph, source, nodes, node_ids) -> np.ndarray:
+    costs, _ = shortest_path_tree(graph, source, ALL_EDGES)
+    row = np.full(len(nodes), np.inf)
+    for node, cost in costs.items():
+        row[node_ids[node]] = cost
+    return row
+
+
+def _farthest(graph, nodes, node_ids, rows, rng) -> int:
+    """Node farthest from the landmarks chosen so far (from a random node for the first)."""
+    if not rows:
+        return int(np.argmax(_finite_or(_distances_from(graph, rng.choice(nodes), nodes, node_ids), -1)))
+    # Nodes no landmark reaches have min distance inf and are picked first,
+    # so every component gets a landmark
+    return int(np.argmax(np.min(np.vstack(rows), axis=0)))
+
+
+def _avoid(graph, nodes, node_ids, landmark_ids, rows, rng) -> int:
+    """
+    'Avoid' selection: grow a shortest path tree from a random root, weight
+    each node by how badly the current landmarks bound its distance to the
+    root, and pick the leaf reached by following the heaviest subtrees that
+    do not already contain a landmark.
+    """
+    root = rng.choice(nodes)
+    costs, prev = shortest_path_tree(graph, root, ALL_EDGES)
+    reached = np.array([node_ids[node] for node in costs])
+    root_id = node_ids[root]
+
+    stacked = np.vstack(rows)
+    with np.errstate(invalid='ignore'):
+        bound = np.max(np.abs(stacked[:, reached] - stacked[:, [root_id]]), axis=0)
+    bound = _finite_or(bound, 0)
+    gap = np.maximum(np.array([costs[node] for node in costs]) - bound, 0)
+    weight = dict(zip(costs, gap.tolist()))
+
+    landmark_nodes = {nodes[i] for i in landmark_ids}
+    children = defaultdict(list)
+    for node, parent in prev.items():
+        if node in costs and parent in costs:
+            children[parent].append(node)
+
+    # Settled order is non-decreasing in cost, so walking it backwards
+    # visits children before parents
+    size = {}
+    blocked = set()
+    for node in reversed(list(costs)):
+        if node in landmark_nodes or any(child in blocked for child in children[node]):
+            blocked.add(node)
+            size[node] = 0.0
+        else:
+            size[node] = weight[node] + sum(size[child] for child in children[node])
+
+    node = root
+    while True:
+        best = max(children[node], key=lambda child: size[child], default=None)
+        if best is None or size[best] <= 0:
+            break
+        node = best
+    if node == root:
+        # Everything near the root is already covered; fall back to farthest
+        return _farthest(graph, nodes, node_ids, rows, rng)
+    return node_ids[node]
+
+
+def _finite_or(values: np.ndarray, fill: float) -> np.ndarray:
+    return np.where(np.isfinite(values), values, fill)
@@ -0,0 +1,236 @@
+"""
+Offline risk heatmap tiles for the map overlay.
+
+Crime and accident incidents are binned into Web Mercator pixels, blurred,
+coloured and written as z/x/y PNG tiles over the Dehradun bounding box. Only
+tiles within blur reach of an incident are rasterised, one at a time, so
+memory stays at one tile whatever the zoom. The map then loads them as a
+normal `TileLayer`, so the overlay costs the browser the same however many
+incidents there are.
+
+    python risk_tiles.py build
+    python risk_tiles.py serve
+"""
+import argparse
+import math
+import os
+import struct
+import zlib
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.config.config import (
+    DEHRADUN_BOUNDING_BOX,
+    CRIME_WEIGHTS,
+    ACCIDENT_SEVERITY_WEIGHTS,
+    CRIME_DATA_PATH,
+    ACCIDENT_DATA_PATH,
+    AREA_CENTROIDS_PATH,
+    RISK_TILES_DIR,
+    RISK_TILES_MIN_ZOOM,
+    RISK_TILES_MAX_ZOOM
+)
+
+TILE_SIZE = 256
+# Heat radius in screen pixels, the same at every zoom level
+BLUR_RADIUS = 12
+# Three box blurs approximate a gaussian
+BLUR_PASSES = 3
+BOX_RADIUS = BLUR_RADIUS // BLUR_PASSES or 1
+# Farthest a single incident's heat spreads, in pixels
+BLUR_MARGIN = BOX_RADIUS * BLUR_PASSES
+
+
+def load_incidents(crime_data_path: str = CRIME_DATA_PATH, accident_data_path: str = ACCIDENT_DATA_PATH,
+                   centroids_path: str = AREA_CENTROIDS_PATH) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Latitude, longitude and weight arrays for every incident. Accidents have
+    their own coordinates; crimes only name an area and are placed at its
+    centroid.
+    """
+    accidents = pd.read_csv(accident_data_path)
+    crimes = pd.read_csv(crime_data_path)
+    centroids = pd.read_csv(centroids_path).set_index('Area')
+
+    crimes = crimes.join(centroids, on='Location', how='inner')
+    lats = np.concatenate([accidents['Latitude'].to_numpy(), crimes['Latitude'].to_numpy()])
+    lons = np.concatenate([accidents['Longitude'].to_numpy(), crimes['Longitude'].to_numpy()])
+    weights = np.concatenate([
+        accidents['Severity'].map(ACCIDENT_SEVERITY_WEIGHTS).fillna(1).to_numpy(),
+        crimes['Crime_Type'].map(CRIME_WEIGHTS).fillna(1).to_numpy()
+    ])
+    return lats, lons, weights.astype(float)
+
+
+def to_pixels(lats, lons, zoom: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Global Web Mercator pixel coordinates at `zoom`."""
+    scale = TILE_SIZE * 2 ** zoom
+    lats = np.radians(np.clip(lats, -85.05112878, 85.05112878))
+    x = (np.asarray(lons) + 180) / 360 * scale
+    y = (1 - np.log(np.tan(lats) + 1 / np.cos(lats)) / math.pi) / 2 * scale
+    return x, y
+
+
+def _tile_range(zoom: int) -> Tuple[int, int, int, int]:
+    bbox = DEHRADUN_BOUNDING_BOX
+    x, y = to_pixels(np.array([bbox['max_lat'], bbox['min_lat']]),
+                     np.array([bbox['min_lon'], bbox['max_lon']]), zoom)
+    return (int(x[0] // TILE_SIZE), int(y[0] // TILE_SIZE),
+            int(x[1] // TILE_SIZE), int(y[1] // TILE_SIZE))
+
+
+def _box_blur(raster: np.ndarray, radius: int, axis: int) -> np.ndarray:
+    pad = [(0, 0), (0, 0)]
+    pad[axis] = (radius + 1, radius)
+    summed = np.cumsum(np.pad(raster, pad), axis=axis)
+    width = 2 * radius + 1
+    upper = np.take(summed, np.arange(width, summed.shape[axis]), axis=axis)
+    lower = np.take(summed, np.arange(0, summed.shape[axis] - width), axis=axis)
+    return (upper - lower) / width
+
+
+def rasterize_tile(px: np.ndarray, py: np.ndarray, weights: np.ndarray, tx: int, ty: int) -> np.ndarray:
+    """
+    Blurred incident density of tile `tx`, `ty` from global integer pixel
+    coordinates. Incidents up to BLUR_MARGIN pixels outside the tile are
+    included, so the result equals the same area of one large raster.
+    """
+    size = TILE_SIZE + 2 * BLUR_MARGIN
+    lx = px - (tx * TILE_SIZE - BLUR_MARGIN)
+    ly = py - (ty * TILE_SIZE - BLUR_MARGIN)
+    inside = (lx >= 0) & (lx < size) & (ly >= 0) & (ly < size)
+    raster = np.bincount(ly[inside] * size + lx[inside], weights=weights[inside],
+                         minlength=size * size).reshape(size, size).astype(np.float32)
+    for _ in range(BLUR_PASSES):
+        raster = _box_blur(raster, BOX_RADIUS, axis=0)
+        raster = _box_blur(raster, BOX_RADIUS, axis=1)
+    return raster[BLUR_MARGIN:-BLUR_MARGIN, BLUR_MARGIN:-BLUR_MARGIN]
+
+
+def tile_rasters(lats, lons, weights, zoom: int) -> Iterator[Tuple[int, int, np.ndarray]]:
+    """
+    Yield (x, y, raster) for every bounding box tile at `zoom` that lies within
+    blur reach of an incident. Incidents outside the bounding box tiles are
+    ignored.
+    """
+    tx0, ty0, tx1, ty1 = _tile_range(zoom)
+    x, y = to_pixels(lats, lons, zoom)
+    px = np.floor(x).astype(np.int64)
+    py = np.floor(y).astype(np.int64)
+    inside = ((px >= tx0 * TILE_SIZE) & (px < (tx1 + 1) * TILE_SIZE) &
+              (py >= ty0 * TILE_SIZE) & (py < (ty1 + 1) * TILE_SIZE))
+    px, py, weights = px[inside], py[inside], np.asarray(weights, dtype=float)[inside]
+
+    # The margin is smaller than a tile, so an incident reaches at most two
+    # tiles per axis: the ones holding its pixel +/- BLUR_MARGIN
+    tiles = set()
+    for dx in (-BLUR_MARGIN, BLUR_MARGIN):
+        for dy in (-BLUR_MARGIN, BLUR_MARGIN):
+            tiles.update(zip(((px + dx) // TILE_SIZE).tolist(), ((py + dy) // TILE_SIZE).tolist()))
+
+    for tx, ty in sorted(tiles):
+        if tx0 <= tx <= tx1 and ty0 <= ty <= ty1:
+            yield tx, ty, rasterize_tile(px, py, weights, tx, ty)
+
+
+def colorize(raster: np.ndarray, peak: Optional[float] = None) -> np.ndarray:
+    """
+    Map density to RGBA: transparent through yellow to red. `peak` is the
+    density shown as full red, by default the raster's own maximum.
+    """
+    if peak is None:
+        peak = raster.max()
+    intensity = np.sqrt(raster / peak) if peak > 0 else np.zeros_like(raster)
+    rgba = np.zeros(raster.shape + (4,), dtype=np.uint8)
+    rgba[..., 0] = 255
+    rgba[..., 1] = (255 * (1 - intensity)).astype(np.uint8)
+    rgba[..., 3] = np.where(intensity > 0.05, 40 + 170 * intensity, 0).astype(np.uint8)
+    return rgba
+
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    """Encode an (h, w, 4) uint8 array as PNG without an imaging library."""
+    height, width, _ = rgba.shape
+    # Each scanline starts with filter type 0 (none)
+    scanlines = np.hstack([np.zeros((height, 1), dtype=np.uint8), rgba.reshape(height, width * 4)])
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) +
+            chunk(b'IDAT', zlib.compress(scanlines.tobytes(), 6)) + chunk(b'IEND', b''))
+
+
+def build_tiles(output_dir: str = RISK_TILES_DIR, min_zoom: int = RISK_TILES_MIN_ZOOM,
+                max_zoom: int = RISK_TILES_MAX_ZOOM) -> int:
+    """Render the tile pyramid into `output_dir`/z/x/y.png. Returns the number of tiles written."""
+    lats, lons, weights = load_incidents()
+    written = 0
+    for zoom in range(min_zoom, max_zoom + 1):
+        # Colours are scaled to the densest pixel of the whole zoom level, so
+        # one pass finds the peak and a second one renders; rasterising a tile
+        # again is cheaper than keeping them all in memory
+        peak = max((raster.max() for _, _, raster in tile_rasters(lats, lons, weights, zoom)), default=0)
+        for tx, ty, raster in tile_rasters(lats, lons, weights, zoom):
+            tile = colorize(raster, peak)
+            # Fully transparent tiles are left out; the map simply shows nothing there
+            if not tile[..., 3].any():
+                continue
+            tile_dir = os.path.join(output_dir, str(zoom), str(tx))
+            os.makedirs(tile_dir, exist_ok=True)
+            with open(os.path.join(tile_dir, f"{ty}.png"), 'wb') as f:
+                f.write(encode_png(tile))
+            written += 1
+        print(f"Rendered zoom {zoom}")
+    return written
+
+
+class _TileHandler(SimpleHTTPRequestHandler):
+    def end_headers(self):
+        # The map runs in a Streamlit component iframe on another origin
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Cache-Control', 'public, max-age=86400')
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_tiles(directory: str = RISK_TILES_DIR, port: int = 8765, host: str = '127.0.0.1'):
+    """Serve the tile directory over HTTP until interrupted."""
+    server = ThreadingHTTPServer((host, port), partial(_TileHandler, directory=directory))
+    print(f"Serving {directory} at http://{host}:{port}/{{z}}/{{x}}/{{y}}.png")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or serve the risk heatmap tiles")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="Render the tile pyramid")
+    build.add_argument('--output', default=RISK_TILES_DIR)
+    build.add_argument('--min-zoom', type=int, default=RISK_TILES_MIN_ZOOM)
+    build.add_argument('--max-zoom', type=int, default=RISK_TILES_MAX_ZOOM)
+    serve = commands.add_parser('serve', help="Serve rendered tiles over HTTP")
+    serve.add_argument('--directory', default=RISK_TILES_DIR)
+    serve.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        written = build_tiles(args.output, args.min_zoom, args.max_zoom)
+        print(f"Wrote {written} tiles to {args.output}")
+    else:
+        serve_tiles(args.directory, args.port)
+
+
+if __name__ == "__main__":
+    main()
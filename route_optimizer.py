@@ -0,0 +1,191 @@
+"""
+Multi-stop route optimisation for delivery runs on the road `Graph`.
+
+The stop-to-stop distance and safety matrices come from one shortest path
+tree per stop (each stopping once every other stop is settled) rather than a
+point-to-point search per pair. The visiting order is then built with
+nearest-neighbour and improved with 2-opt and Or-opt moves until no move helps
+or the time budget runs out.
+"""
+import time
+from typing import Dict, List, Optional, Tuple
+
+import tracing
+from routing import shortest_path_tree, path_from_tree
+from src.config.config import DEFAULT_SAFETY_THRESHOLD, ROUTE_OPTIMIZER_TIME_LIMIT
+
+INF = float('inf')
+# Or-opt moves chains of up to this many consecutive stops
+OR_OPT_MAX_SEGMENT = 3
+
+
+def build_cost_matrix(graph, stops: List[tuple], safety_threshold: int = DEFAULT_SAFETY_THRESHOLD
+                      ) -> Tuple[List[List[float]], List[List[float]], List[dict]]:
+    """
+    Distance (km) and safety matrices between graph nodes `stops`.
+
+    safety[i][j] is the lowest edge safety score on the shortest path from
+    stop i to stop j. Unreachable pairs get INF distance and 0 safety. The
+    predecessor trees are returned too so paths can be stitched later.
+    """
+    n = len(stops)
+    distances = [[INF] * n for _ in range(n)]
+    safety = [[0.0] * n for _ in range(n)]
+    trees = []
+    with tracing.span('cost_matrix'):
+        for i, source in enumerate(stops):
+            costs, prev = shortest_path_tree(graph, source, safety_threshold, targets=stops)
+            trees.append(prev)
+            for j, target in enumerate(stops):
+                if target not in costs:
+                    continue
+                distances[i][j] = costs[target]
+                path = path_from_tree(prev, source, target)
+                safety[i][j] = min(
+                    (graph.get_safety_score(u, v) for u, v in zip(path, path[1:])),
+                    default=100
+                )
+    return distances, safety, trees
+
+
+def tour_cost(order: List[int], matrix: List[List[float]]) -> float:
+    return sum(matrix[a][b] for a, b in zip(order, order[1:]))
+
+
+def nearest_neighbour(matrix: List[List[float]], start: int = 0, end: Optional[int] = None) -> List[int]:
+    """Greedy order starting at `start` and, if given, finishing at `end`."""
+    unvisited = set(range(len(matrix))) - {start}
+    if end is not None:
+        unvisited.discard(end)
+    order = [start]
+    while unvisited:
+        current = order[-1]
+        nearest = min(unvisited, key=lambda j: matrix[current][j])
+        order.append(nearest)
+        unvisited.remove(nearest)
+    if end is not None:
+        order.append(end)
+    return order
+
+
+def two_opt(order: List[int], matrix: List[List[float]], deadline: float, fixed_end: bool) -> bool:
+    """Reverse segments while that shortens the route. Returns True if anything changed."""
+    n = len(order)
+    last = n - 2 if fixed_end else n - 1
+    changed = False
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = False
+        for i in range(1, last):
+            a, b = order[i - 1], order[i]
+            for j in range(i + 1, last + 1):
+                c = order[j]
+                d = order[j + 1] if j + 1 < n else None
+                before = matrix[a][b] + (matrix[c][d] if d is not None else 0)
+                after = matrix[a][c] + (matrix[b][d] if d is not None else 0)
+                if after < before - 1e-9:
+                    order[i:j + 1] = order[i:j + 1][::-1]
+                    b = order[i]
+                    improved = changed = True
+            if time.monotonic() >= deadline:
+                break
+    return changed
+
+
+def or_opt(order: List[int], matrix: List[List[float]], deadline: float, fixed_end: bool) -> bool:
+    """Move short chains of stops, possibly reversed, to a cheaper position."""
+    changed = False
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = False
+        n = len(order)
+        last = n - 2 if fixed_end else n - 1
+        for length in range(1, OR_OPT_MAX_SEGMENT + 1):
+            for i in range(1, last - length + 2):
+                segment = order[i:i + length]
+                prev, nxt = order[i - 1], (order[i + length] if i + length < n else None)
+                removed = matrix[prev][segment[0]] + (matrix[segment[-1]][nxt] if nxt is not None else 0)
+                bridged = matrix[prev][nxt] if nxt is not None else 0
+                rest = order[:i] + order[i + length:]
+                rest_last = len(rest) - 2 if fixed_end else len(rest) - 1
+                best = None
+                for k in range(rest_last + 1):
+                    if k == i - 1:
+                        continue
+                    a, b = rest[k], (rest[k + 1] if k + 1 < len(rest) else None)
+                    for chain in (segment, segment[::-1]):
+                        added = matrix[a][chain[0]] + (matrix[chain[-1]][b] if b is not None else 0)
+                        broken = matrix[a][b] if b is not None else 0
+                        delta = (added - broken) - (removed - bridged)
+                        if delta < -1e-9 and (best is None or delta < best[0]):
+                            best = (delta, k, chain)
+                if best is not None:
+                    _, k, chain = best
+                    order[:] = rest[:k + 1] + chain + rest[k + 1:]
+                    improved = changed = True
+                    break
+                if time.monotonic() >= deadline:
+                    return changed
+            if improved:
+                break
+    return changed
+
+
+def solve_order(matrix: List[List[float]], start: int = 0, end: Optional[int] = None,
+                return_to_start: bool = False, time_limit: float = ROUTE_OPTIMIZER_TIME_LIMIT) -> List[int]:
+    """
+    Visiting order over all matrix indices, beginning at `start`. The route
+    finishes at `end` if given, back at `start` if `return_to_start`, and
+    anywhere otherwise.
+    """
+    deadline = time.monotonic() + time_limit
+    if return_to_start:
+        end = start
+    if end == start and not return_to_start:
+        raise ValueError("end must differ from start unless return_to_start is set")
+
+    if return_to_start:
+        order = nearest_neighbour(matrix, start) + [start]
+    else:
+        order = nearest_neighbour(matrix, start, end)
+    fixed_end = end is not None
+
+    if len(order) > 3:
+        changed = True
+        while changed and time.monotonic() < deadline:
+            changed = two_opt(order, matrix, deadline, fixed_end)
+            changed = or_opt(order, matrix, deadline, fixed_end) or changed
+    return order
+
+
+def optimise_stops(graph, stops: List[tuple], safety_threshold: int = DEFAULT_SAFETY_THRESHOLD,
+                   start: int = 0, end: Optional[int] = None, return_to_start: bool = False,
+                   time_limit: float = ROUTE_OPTIMIZER_TIME_LIMIT) -> Dict[str, object]:
+    """
+    Best found order for visiting graph nodes `stops` and the stitched road path.
+
+    Returns a dict with the stop `order` (indices into `stops`), the node
+    `path`, the total `distance` in km, per-leg `legs` distances and the
+    lowest edge safety score on the route as `min_safety`.
+    """
+    if not stops:
+        raise ValueError("No stops to optimise")
+    distances, safety, trees = build_cost_matrix(graph, stops, safety_threshold)
+    with tracing.span('optimise_order'):
+        order = solve_order(distances, start, end, return_to_start, time_limit)
+
+    legs = [distances[a][b] for a, b in zip(order, order[1:])]
+    if any(leg == INF for leg in legs):
+        raise ValueError("Some stops cannot be reached with the current safety threshold")
+
+    path = [stops[order[0]]]
+    for a, b in zip(order, order[1:]):
+        path.extend(path_from_tree(trees[a], stops[a], stops[b])[1:])
+
+    return {
+        'order': order,
+        'path': path,
+        'distance': sum(legs),
+        'legs': legs,
+        'min_safety': min((safety[a][b] for a, b in zip(order, order[1:])), default=100),
+    }
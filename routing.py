@@ -0,0 +1,274 @@
+import math
+import heapq
+from collections import defaultdict
+
+import tracing
+
+# Graph representation of Dehradun roads
+class Graph:
+    def __init__(self):
+        self.graph = defaultdict(list)
+        self.weights = {}
+        self.safety_scores = {}
+    def add_edge(self, u, v, weight, safety_score):
+        self.graph[u].append(v)
+        self.graph[v].append(u)
+        self.weights[(u, v)] = weight
+        self.weights[(v, u)] = weight
+        self.safety_scores[(u, v)] = safety_score
+        self.safety_scores[(v, u)] = safety_score
+    def get_neighbors(self, node):
+        return self.graph[node]
+    def get_weight(self, u, v):
+        return self.weights.get((u, v), float('inf'))
+    def get_safety_score(self, u, v):
+        return self.safety_scores.get((u, v), 0)
+
+def haversine(a, b):
+    """Great-circle distance in km between two (lat, lng) points."""
+    lat1, lon1 = a
+    lat2, lon2 = b
+    R = 6371
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    delta_phi = math.radians(lat2 - lat1)
+    delta_lambda = math.radians(lon2 - lon1)
+    a_ = math.sin(delta_phi/2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda/2)**2
+    c = 2 * math.atan2(math.sqrt(a_), math.sqrt(1-a_))
+    return R * c
+
+def _record_search(algorithm, nodes_expanded, heap_pushes):
+    tracing.incr(f"{algorithm}_nodes_expanded", nodes_expanded)
+    tracing.incr(f"{algorithm}_heap_pushes", heap_pushes)
+
+# Dijkstra's algorithm with safety score consideration
+def dijkstra(graph, start, end, safety_threshold=50):
+    distances = {node: float('inf') for node in graph.graph}
+    distances[start] = 0
+    pq = [(0, start, [])]
+    visited = set()
+    pushes = 1
+    while pq:
+        (dist, current, path) = heapq.heappop(pq)
+        if current in visited:
+            continue
+        visited.add(current)
+        path = path + [current]
+        if current == end:
+            _record_search('dijkstra', len(visited), pushes)
+            return path, dist
+        for neighbor in graph.get_neighbors(current):
+            if neighbor in visited:
+                continue
+            weight = graph.get_weight(current, neighbor)
+            safety_score = graph.get_safety_score(current, neighbor)
+            if safety_score < safety_threshold:
+                continue
+            new_dist = dist + weight
+            if new_dist < distances[neighbor]:
+                distances[neighbor] = new_dist
+                heapq.heappush(pq, (new_dist, neighbor, path))
+                pushes += 1
+    _record_search('dijkstra', len(visited), pushes)
+    return None, float('inf')
+
+# A* algorithm with safety score consideration
+def a_star(graph, start, end, safety_threshold=50, landmarks=None):
+    # Landmark (ALT) bounds are much tighter than straight-line distance
+    if landmarks is not None:
+        to_end = landmarks.heuristic_to(end)
+        heuristic = lambda node, _end: to_end(node)
+    else:
+        heuristic = haversine
+    open_set = []
+    heapq.heappush(open_set, (0, start))
+    came_from = {}
+    g_score = {node: float('inf') for node in graph.graph}
+    g_score[start] = 0
+    f_score = {node: float('inf') for node in graph.graph}
+    f_score[start] = heuristic(start, end)
+    expanded = 0
+    pushes = 1
+    while open_set:
+        priority, current = heapq.heappop(open_set)
+        # Skip entries left behind when a node was pushed again with a lower score
+        if priority > f_score[current]:
+            continue
+        expanded += 1
+        if current == end:
+            _record_search('a_star', expanded, pushes)
+            path = []
+            while current in came_from:
+                path.append(current)
+                current = came_from[current]
+            path.append(start)
+            return path[::-1], g_score[end]
+        for neighbor in graph.get_neighbors(current):
+            tentative_g_score = g_score[current] + graph.get_weight(current, neighbor)
+            if tentative_g_score >= g_score[neighbor]:
+                continue
+            safety_score = graph.get_safety_score(current, neighbor)
+            if safety_score < safety_threshold:
+                continue
+            came_from[neighbor] = current
+            g_score[neighbor] = tentative_g_score
+            f_score[neighbor] = tentative_g_score + heuristic(neighbor, end)
+            heapq.heappush(open_set, (f_score[neighbor], neighbor))
+            pushes += 1
+    _record_search('a_star', expanded, pushes)
+    return None, float('inf')
+
+# Bidirectional A* with safety score consideration
+def bidirectional_a_star(graph, start, end, safety_threshold=50, landmarks=None):
+    """
+    A* from both ends at once. Both searches use the average of the forward
+    and backward bounds as potential, which keeps them consistent with each
+    other, and stop once neither can still find a shorter meeting path.
+    """
+    if start == end:
+        return [start], 0
+    if landmarks is not None:
+        to_end = landmarks.heuristic_to(end)
+        to_start = landmarks.heuristic_to(start)
+    else:
+        to_end = lambda node: haversine(node, end)
+        to_start = lambda node: haversine(node, start)
+    def potential(node):
+        return (to_end(node) - to_start(node)) / 2
+
+    dist = ({start: 0}, {end: 0})
+    prev = ({}, {})
+    settled = (set(), set())
+    # The backward search uses the negated potential
+    sign = (1, -1)
+    queues = ([(potential(start), start)], [(-potential(end), end)])
+    # Both searches then run Dijkstra on the same non-negative reduced edge
+    # costs, so the usual bidirectional stopping rule applies to the keys
+    offsets = (potential(start), -potential(end))
+    best, meeting = float('inf'), None
+    expanded = 0
+    pushes = 2
+    while queues[0] and queues[1]:
+        if queues[0][0][0] + queues[1][0][0] >= best:
+            break
+        side = 0 if queues[0][0][0] - offsets[0] <= queues[1][0][0] - offsets[1] else 1
+        _, current = heapq.heappop(queues[side])
+        if current in settled[side]:
+            continue
+        settled[side].add(current)
+        expanded += 1
+        for neighbor in graph.get_neighbors(current):
+            if neighbor in settled[side]:
+                continue
+            if graph.get_safety_score(current, neighbor) < safety_threshold:
+                continue
+            new_dist = dist[side][current] + graph.get_weight(current, neighbor)
+            if new_dist < dist[side].get(neighbor, float('inf')):
+                dist[side][neighbor] = new_dist
+                prev[side][neighbor] = current
+                heapq.heappush(queues[side], (new_dist + sign[side] * potential(neighbor), neighbor))
+                pushes += 1
+                other = dist[1 - side].get(neighbor)
+                if other is not None and new_dist + other < best:
+                    best, meeting = new_dist + other, neighbor
+    _record_search('bidirectional_a_star', expanded, pushes)
+    if meeting is None:
+        return None, float('inf')
+    path = path_from_tree(prev[0], start, meeting)
+    backward = path_from_tree(prev[1], end, meeting)
+    return path + backward[::-1][1:], best
+
+def shortest_path_tree(graph, source, safety_threshold=50, targets=None, max_cost=None):
+    """
+    One-to-many Dijkstra from `source` over edges meeting the safety threshold.
+    Stops as soon as every node in `targets` is settled (or explores the whole
+    graph when `targets` is None), and never settles nodes costing more than
+    `max_cost`. Returns (costs, prev): settled distances and the predecessor
+    of each reached node.
+    """
+    costs = {}
+    prev = {}
+    tentative = {source: 0}
+    remaining = set(targets) if targets is not None else None
+    pq = [(0, source)]
+    pushes = 1
+    while pq:
+        dist, current = heapq.heappop(pq)
+        if current in costs:
+            continue
+        if max_cost is not None and dist > max_cost:
+            break
+        costs[current] = dist
+        if remaining is not None:
+            remaining.discard(current)
+            if not remaining:
+                break
+        for neighbor in graph.get_neighbors(current):
+            if neighbor in costs:
+                continue
+            if graph.get_safety_score(current, neighbor) < safety_threshold:
+                continue
+            new_dist = dist + graph.get_weight(current, neighbor)
+            if new_dist < tentative.get(neighbor, float('inf')):
+                tentative[neighbor] = new_dist
+                prev[neighbor] = current
+                heapq.heappush(pq, (new_dist, neighbor))
+                pushes += 1
+    _record_search('shortest_path_tree', len(costs), pushes)
+    return costs, prev
+
+def multi_source_dijkstra(graph, sources, safety_threshold=50):
+    """
+    Dijkstra seeded from many sources at once. `sources` holds
+    (node, label, initial_cost) tuples. Every reachable node ends up with the
+    cost to its closest source and that source's label. Returns (costs, labels).
+    """
+    costs = {}
+    labels = {}
+    tentative = {}
+    pq = []
+    for node, label, initial_cost in sources:
+        if initial_cost < tentative.get(node, float('inf')):
+            tentative[node] = initial_cost
+            labels[node] = label
+            pq.append((initial_cost, node))
+    heapq.heapify(pq)
+    pushes = len(pq)
+    while pq:
+        dist, current = heapq.heappop(pq)
+        if current in costs:
+            continue
+        costs[current] = dist
+        for neighbor in graph.get_neighbors(current):
+            if neighbor in costs:
+                continue
+            if graph.get_safety_score(current, neighbor) < safety_threshold:
+                continue
+            new_dist = dist + graph.get_weight(current, neighbor)
+            if new_dist < tentative.get(neighbor, float('inf')):
+                tentative[neighbor] = new_dist
+                labels[neighbor] = labels[current]
+                heapq.heappush(pq, (new_dist, neighbor))
+                pushes += 1
+    _record_search('multi_source_dijkstra', len(costs), pushes)
+    return costs, labels
+
+def path_from_tree(prev, source, target):
+    """Walk the predecessors from `shortest_path_tree` back from `target` to `source`."""
+    path = [target]
+    while path[-1] != source:
+        if path[-1] not in prev:
+            return None
+        path.append(prev[path[-1]])
+    return path[::-1]
+
+def find_nearest_node(graph, coord):
+    """Find the nearest node in the graph to the given coordinate (lat, lng)."""
+    min_dist = float('inf')
+    nearest = None
+    for node in graph.graph.keys():
+        dist = haversine(coord, node)
+        if dist < min_dist:
+            min_dist = dist
+            nearest = node
+    return nearest
@@ -0,0 +1,229 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+import openrouteservice
+from requests.adapters import HTTPAdapter
+
+import tracing
+from routing import dijkstra, find_nearest_node
+from src.config.config import (
+    ORS_API_KEY,
+    DEFAULT_SAFETY_THRESHOLD,
+    ROUTING_PROVIDER,
+    ROUTING_TIMEOUT,
+    ROUTING_MAX_CONCURRENT,
+    ORS_POOL_SIZE,
+    LOCAL_ROUTING_LATENCY,
+    LOCAL_ROUTING_SPEED,
+    CACHE_ENABLED,
+    CACHE_TIMEOUT,
+    CACHE_MAX_SIZE
+)
+
+
+class RoutingProvider:
+    """
+    Base class for routing backends.
+
+    Subclasses implement `_fetch_directions` and return ORS-style GeoJSON.
+    Identical requests that are already in flight are coalesced into a single
+    backend call, the number of concurrent backend calls is capped, and
+    finished routes are kept in a small TTL cache so Streamlit reruns do not
+    hit the backend again.
+    """
+
+    span_name = 'routing'
+
+    def __init__(self, timeout: float = ROUTING_TIMEOUT, max_concurrent: int = ROUTING_MAX_CONCURRENT,
+                 cache_enabled: bool = CACHE_ENABLED, cache_timeout: float = CACHE_TIMEOUT,
+                 cache_max_size: int = CACHE_MAX_SIZE):
+        self.timeout = timeout
+        self.cache_enabled = cache_enabled
+        self.cache_timeout = cache_timeout
+        self.cache_max_size = cache_max_size
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._in_flight: Dict[tuple, Future] = {}
+        self._cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+    def directions(self, coordinates: List[List[float]], profile: str = 'driving-car', format: str = 'geojson') -> dict:
+        """
+        Get a route through `coordinates` given as [lon, lat] pairs.
+        """
+        key = self._request_key(coordinates, profile, format)
+        route = self._cached(key)
+        if route is not None:
+            return route
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not leader:
+            tracing.incr('routing_coalesced_requests')
+            # The leader always settles the future, with its route or its
+            # error (including its own timeouts), so no separate wait limit
+            return future.result()
+
+        try:
+            if not self._slots.acquire(timeout=self.timeout):
+                raise TimeoutError("Too many routing requests in flight")
+            try:
+                with tracing.span(self.span_name):
+                    route = self._fetch_directions(coordinates, profile, format)
+            finally:
+                self._slots.release()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self._remember(key, route)
+            future.set_result(route)
+            return route
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def _fetch_directions(self, coordinates, profile, format):
+        raise NotImplementedError
+
+    @staticmethod
+    def _request_key(coordinates, profile, format):
+        points = tuple((round(lon, 6), round(lat, 6)) for lon, lat in coordinates)
+        return (points, profile, format)
+
+    def _cached(self, key):
+        if not self.cache_enabled:
+            return None
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.cache_timeout:
+                del self._cache[key]
+                entry = None
+            if entry is not None:
+                self._cache.move_to_end(key)
+        tracing.incr('routing_cache_hits' if entry is not None else 'routing_cache_misses')
+        return entry[1] if entry is not None else None
+
+    def _remember(self, key, route):
+        if not self.cache_enabled:
+            return
+        with self._lock:
+            self._cache[key] = (time.monotonic(), route)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_max_size:
+                self._cache.popitem(last=False)
+
+
+class ORSRoutingProvider(RoutingProvider):
+    """Routing through the OpenRouteService API over a pooled HTTP session."""
+
+    span_name = 'ors'
+
+    def __init__(self, api_key: Optional[str] = ORS_API_KEY, pool_size: int = ORS_POOL_SIZE, **kwargs):
+        super().__init__(**kwargs)
+        # The ORS client retries 429/503 itself until `retry_timeout`; that is
+        # the only retry layer, so a request holds its slot for at most about
+        # `retry_timeout` plus one request `timeout`
+        self.client = openrouteservice.Client(
+            key=api_key,
+            timeout=self.timeout,
+            retry_timeout=self.timeout
+        )
+        # The client keeps one requests.Session; give it a pool large enough
+        # for our concurrency cap
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.client._session.mount('https://', adapter)
+        self.client._session.mount('http://', adapter)
+
+    def _fetch_directions(self, coordinates, profile, format):
+        return self.client.directions(
+            coordinates=coordinates,
+            profile=profile,
+            format=format
+        )
+
+
+class LocalRoutingProvider(RoutingProvider):
+    """
+    Offline stand-in for ORS backed by the in-process road `Graph`.
+
+    Points are snapped to the nearest graph node and joined with `dijkstra`.
+    `latency` adds a fixed delay per request so callers see predictable timing.
+    """
+
+    span_name = 'local_routing'
+
+    def __init__(self, graph, safety_threshold: int = DEFAULT_SAFETY_THRESHOLD,
+                 latency: float = LOCAL_ROUTING_LATENCY, speed_kmh: float = LOCAL_ROUTING_SPEED, **kwargs):
+        super().__init__(**kwargs)
+        self.graph = graph
+        self.safety_threshold = safety_threshold
+        self.latency = latency
+        self.speed_kmh = speed_kmh
+
+    def _fetch_directions(self, coordinates, profile, format):
+        if self.latency:
+            time.sleep(self.latency)
+
+        nodes = [find_nearest_node(self.graph, (lat, lon)) for lon, lat in coordinates]
+        if any(node is None for node in nodes):
+            raise ValueError("Road graph is empty")
+
+        path = [nodes[0]]
+        way_points = [0]
+        distance = 0.0
+        for start, end in zip(nodes, nodes[1:]):
+            leg, leg_distance = dijkstra(self.graph, start, end, self.safety_threshold)
+            if leg is None:
+                raise ValueError(f"No route found between {start} and {end}")
+            path.extend(leg[1:])
+            way_points.append(len(path) - 1)
+            distance += leg_distance
+
+        line = [[lon, lat] for lat, lon in path]
+        lons = [p[0] for p in line]
+        lats = [p[1] for p in line]
+        return {
+            'type': 'FeatureCollection',
+            'bbox': [min(lons), min(lats), max(lons), max(lats)],
+            'features': [{
+                'type': 'Feature',
+                'bbox': [min(lons), min(lats), max(lons), max(lats)],
+                'geometry': {
+                    'type': 'LineString',
+                    'coordinates': line
+                },
+                'properties': {
+                    'summary': {
+                        'distance': distance * 1000,
+                        'duration': distance / self.speed_kmh * 3600
+                    },
+                    'way_points': way_points
+                }
+            }],
+            'metadata': {
+                'query': {
+                    'coordinates': coordinates,
+                    'profile': profile,
+                    'format': format
+                }
+            }
+        }
+
+
+def create_routing_provider(graph=None, provider: str = ROUTING_PROVIDER) -> RoutingProvider:
+    """Create the routing provider selected by `ROUTING_PROVIDER`."""
+    if provider == 'local':
+        if graph is None:
+            raise ValueError("The local routing provider needs a road graph")
+        return LocalRoutingProvider(graph)
+    if provider == 'ors':
+        return ORSRoutingProvider()
+    raise ValueError(f"Unknown routing provider: {provider}")
@@ -0,0 +1,21 @@
+import pandas as pd
+
+from src.config.config import CRIME_WEIGHTS
+
+# Calculate safety scores based on crime data
+def calculate_safety_score(location, crime_data: pd.DataFrame) -> float:
+    try:
+        area_crimes = crime_data[crime_data['Location'] == location]
+        crime_weights = CRIME_WEIGHTS
+        total_score = 0
+        for _, crime in area_crimes.iterrows():
+            crime_type = crime['Crime_Type']
+            total_score += crime_weights.get(crime_type, 1)
+        max_possible_score = sum(crime_weights.values()) * len(area_crimes)
+        if max_possible_score == 0:
+            return 100
+        safety_score = (1 - (total_score / max_possible_score)) * 100
+        return max(0, min(100, safety_score))
+    except Exception as e:
+        print(f"Error calculating safety score: {e}")
+        return 0
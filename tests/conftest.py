@@ -0,0 +1,31 @@
+import random
+
+import pytest
+
+from routing import Graph, haversine
+
+
+def make_random_graph(seed: int, nodes_per_component: int = 60, components: int = 2) -> Graph:
+    """
+    Random road-like graph made of separate components. Weights are at least
+    the straight-line distance, as on real roads, so haversine stays a valid
+    A* bound.
+    """
+    rng = random.Random(seed)
+    graph = Graph()
+    for c in range(components):
+        lat0, lon0 = 30.25 + 0.1 * c, 77.95 + 0.1 * c
+        nodes = [(round(lat0 + rng.uniform(0, 0.05), 6), round(lon0 + rng.uniform(0, 0.05), 6))
+                 for _ in range(nodes_per_component)]
+        # A spanning chain keeps each component connected at threshold 0
+        for u, v in zip(nodes, nodes[1:]):
+            graph.add_edge(u, v, haversine(u, v) * rng.uniform(1.0, 1.5), rng.uniform(0, 100))
+        for _ in range(nodes_per_component * 2):
+            u, v = rng.sample(nodes, 2)
+            graph.add_edge(u, v, haversine(u, v) * rng.uniform(1.0, 1.5), rng.uniform(0, 100))
+    return graph
+
+
+@pytest.fixture(params=[0, 1, 2])
+def random_graph(request):
+    return make_random_graph(request.param)
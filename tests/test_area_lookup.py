@@ -0,0 +1,94 @@
+import json
+
+import numpy as np
+
+from area_lookup import AreaIndex, UNKNOWN_AREA
+
+
+def square(x0, y0, x1, y1):
+    return np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]], dtype=float)
+
+
+# Area "Ring" is a square with a square hole; "East" sits next to it
+POLYGONS = [
+    [square(78.00, 30.30, 78.02, 30.32), square(78.005, 30.305, 78.015, 30.315)],
+    [square(78.03, 30.30, 78.05, 30.32)],
+]
+LATS = [30.301, 30.310, 30.310, 30.400, 30.330]
+LONS = [78.001, 78.010, 78.040, 78.010, 78.010]
+
+
+def test_centroid_lookup_matches_brute_force():
+    rng = np.random.default_rng(0)
+    lats, lons = rng.uniform(30.25, 30.40, 20), rng.uniform(77.95, 78.10, 20)
+    index = AreaIndex([f"A{i}" for i in range(20)], lats, lons, max_distance_km=None)
+
+    qlats, qlons = rng.uniform(30.2, 30.5, 5000), rng.uniform(77.9, 78.3, 5000)
+    x = lambda lon: lon * np.cos(np.radians(lats.mean()))
+    d2 = (x(qlons)[:, None] - x(lons)[None, :]) ** 2 + (qlats[:, None] - lats[None, :]) ** 2
+    assert (index.lookup_indices(qlats, qlons) == d2.argmin(axis=1)).all()
+
+
+def test_points_outside_polygons_are_unknown():
+    index = AreaIndex(['Ring', 'East'], [30.31, 30.31], [78.01, 78.04], polygons=POLYGONS)
+    assert index.lookup_many(LATS, LONS).tolist() == ['Ring', UNKNOWN_AREA, 'East', UNKNOWN_AREA, UNKNOWN_AREA]
+
+
+def test_nearest_fallback_is_opt_in():
+    index = AreaIndex(['Ring', 'East'], [30.31, 30.31], [78.01, 78.04], polygons=POLYGONS,
+                      nearest_fallback=True)
+    assert index.lookup_many(LATS, LONS).tolist() == ['Ring', 'Ring', 'East', UNKNOWN_AREA, 'Ring']
+
+
+def test_from_geojson_reads_polygons_and_multipolygons(tmp_path):
+    features = [
+        {'type': 'Feature', 'properties': {'name': 'Ring'},
+         'geometry': {'type': 'Polygon', 'coordinates': [ring.tolist() for ring in POLYGONS[0]]}},
+        {'type': 'Feature', 'properties': {'name': 'Islands'},
+         'geometry': {'type': 'MultiPolygon', 'coordinates': [
+             [POLYGONS[1][0].tolist()],
+             [square(78.00, 30.39, 78.02, 30.41).tolist()],
+         ]}},
+        {'type': 'Feature', 'properties': {'name': 'Pin'},
+         'geometry': {'type': 'Point', 'coordinates': [78.01, 30.33]}},
+    ]
+    path = tmp_path / 'areas.geojson'
+    path.write_text(json.dumps({'type': 'FeatureCollection', 'features': features}))
+
+    index = AreaIndex.from_geojson(str(path))
+    assert index.names.tolist() == ['Ring', 'Islands', UNKNOWN_AREA]
+    assert index.lookup_many(LATS, LONS).tolist() == ['Ring', UNKNOWN_AREA, 'Islands', 'Islands', UNKNOWN_AREA]
+
+
+def brute_force_containing(polygons, lats, lons):
+    result = np.full(len(lats), len(polygons))
+    for i in reversed(range(len(polygons))):
+        inside = np.zeros(len(lats), dtype=bool)
+        for ring in polygons[i]:
+            xi, yi = ring[:, 0], ring[:, 1]
+            xj, yj = np.roll(xi, 1), np.roll(yi, 1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                hit = (((yi > lats[:, None]) != (yj > lats[:, None])) &
+                       (lons[:, None] < (xj - xi) * (lats[:, None] - yi) / (yj - yi) + xi))
+            inside ^= hit.sum(axis=1) % 2 == 1
+        result[inside] = i
+    return result
+
+
+def test_polygon_grid_matches_brute_force():
+    # Irregular, overlapping star-shaped polygons, some with a hole
+    rng = np.random.default_rng(1)
+    polygons = []
+    for _ in range(30):
+        lat, lon = rng.uniform(30.27, 30.38), rng.uniform(77.97, 78.08)
+        angles = np.sort(rng.uniform(0, 2 * np.pi, 25))
+        radius = rng.uniform(0.003, 0.015, 25)
+        rings = [np.column_stack([lon + radius * np.cos(angles), lat + radius * np.sin(angles)])]
+        if rng.random() < 0.3:
+            rings.append(np.column_stack([lon + 0.001 * np.cos(angles), lat + 0.001 * np.sin(angles)]))
+        polygons.append(rings)
+    index = AreaIndex([f"P{i}" for i in range(30)], np.zeros(30) + 30.3, np.zeros(30) + 78.0,
+                      polygons=polygons, cell_km=0.3)
+
+    lats, lons = rng.uniform(30.24, 30.41, 20000), rng.uniform(77.94, 78.11, 20000)
+    assert (index.lookup_indices(lats, lons) == brute_force_containing(polygons, lats, lons)).all()
@@ -0,0 +1,101 @@
+import logging
+import math
+import random
+
+import pandas as pd
+import pytest
+
+from conftest import make_random_graph
+from facilities import FacilityLayer, load_facilities
+from routing import dijkstra, find_nearest_node, haversine
+
+SAFETY_THRESHOLD = 30
+
+
+def offset(node, rng):
+    """A point near `node`, as a facility that sits a little off the road."""
+    return node[0] + rng.uniform(-0.002, 0.002), node[1] + rng.uniform(-0.002, 0.002)
+
+
+@pytest.fixture
+def graph():
+    return make_random_graph(0)
+
+
+@pytest.fixture
+def facilities(graph):
+    rng = random.Random(0)
+    first = [node for node in graph.graph if node[0] < 30.3]
+    second = [node for node in graph.graph if node[0] >= 30.35]
+    rows = []
+    for name, facility_type, nodes, count in [('H', 'hospital', first + second, 4),
+                                              ('F', 'fire_station', first, 2),
+                                              # Police only in the second component
+                                              ('P', 'police', second, 1)]:
+        for i, node in enumerate(rng.sample(nodes, count)):
+            lat, lon = offset(node, rng)
+            rows.append({'Name': f"{name}{i}", 'Type': facility_type, 'Latitude': lat, 'Longitude': lon})
+    return pd.DataFrame(rows)
+
+
+def brute_force_nearest(graph, facilities, node, facility_type):
+    """(distance, name) of the closest facility, one Dijkstra per facility."""
+    best = (math.inf, '')
+    for _, row in facilities[facilities['Type'] == facility_type].iterrows():
+        coords = (row['Latitude'], row['Longitude'])
+        snapped = find_nearest_node(graph, coords)
+        _, distance = dijkstra(graph, snapped, node, SAFETY_THRESHOLD)
+        best = min(best, (distance + haversine(coords, snapped), row['Name']))
+    return best
+
+
+@pytest.mark.parametrize('facility_type', ['hospital', 'fire_station', 'police'])
+def test_nearest_facility_matches_brute_force(graph, facilities, facility_type):
+    layer = FacilityLayer(graph, facilities, SAFETY_THRESHOLD)
+    for node in random.Random(1).sample(list(graph.graph), 30):
+        distance, name = brute_force_nearest(graph, facilities, node, facility_type)
+        found = layer.nearest_facility(node, facility_type)
+        if distance == math.inf:
+            assert found is None
+            continue
+        assert found['distance'] == pytest.approx(distance, rel=1e-5)
+        assert found['name'] == name
+        assert found['type'] == facility_type and found['node'] == node
+
+
+def test_nearest_along_picks_the_closest_route_node(graph, facilities):
+    layer = FacilityLayer(graph, facilities, SAFETY_THRESHOLD)
+    path = random.Random(2).sample([node for node in graph.graph if node[0] < 30.3], 8)
+    found = layer.nearest_along(path, 'hospital')
+
+    expected = min(brute_force_nearest(graph, facilities, node, 'hospital')[0] for node in path)
+    assert found['distance'] == pytest.approx(expected, rel=1e-5)
+    assert found['node'] in path
+    assert found == layer.nearest_facility(found['node'], 'hospital')
+
+    # No police station is reachable from the first component
+    assert layer.nearest_along(path, 'police') is None
+    assert layer.nearest_along([(0.0, 0.0)], 'hospital') is None
+
+
+def test_load_facilities_places_police_at_area_centroids(tmp_path, caplog):
+    facilities_path = tmp_path / 'facilities.csv'
+    pd.DataFrame([{'Name': "City Hospital", 'Type': 'hospital', 'Latitude': 30.32, 'Longitude': 78.03}]
+                 ).to_csv(facilities_path, index=False)
+    crime_path = tmp_path / 'crime.csv'
+    pd.DataFrame({'Police_Station': ['Rajpur', 'Clement Town', 'Rajpur', None, 'Nowhere']}
+                 ).to_csv(crime_path, index=False)
+    centroids_path = tmp_path / 'centroids.csv'
+    pd.DataFrame([{'Area': 'Rajpur', 'Latitude': 30.37, 'Longitude': 78.08},
+                  {'Area': 'Clement Town', 'Latitude': 30.27, 'Longitude': 78.01}]
+                 ).to_csv(centroids_path, index=False)
+
+    with caplog.at_level(logging.WARNING, logger='route_planner'):
+        facilities = load_facilities(str(facilities_path), str(crime_path), str(centroids_path))
+
+    assert facilities.to_dict('records') == [
+        {'Name': "City Hospital", 'Type': 'hospital', 'Latitude': 30.32, 'Longitude': 78.03},
+        {'Name': "Clement Town Police Station", 'Type': 'police', 'Latitude': 30.27, 'Longitude': 78.01},
+        {'Name': "Rajpur Police Station", 'Type': 'police', 'Latitude': 30.37, 'Longitude': 78.08},
+    ]
+    assert [record.getMessage() for record in caplog.records] == ["No coordinates for police station: Nowhere"]
@@ -0,0 +1,86 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from isochrone import isochrone, isochrones, reachable_nodes, reachable_polygon
+from routing import Graph, dijkstra
+
+SAFETY_THRESHOLD = 30
+
+
+def contains(polygon, point):
+    """Even-odd test on [lat, lon] vertices; vertices count as inside."""
+    if list(point) in polygon:
+        return True
+    y, x = point
+    inside = False
+    for (yi, xi), (yj, xj) in zip(polygon, polygon[-1:] + polygon[:-1]):
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+    return inside
+
+
+@pytest.mark.parametrize('max_distance', [0.5, 2.0, 10.0])
+def test_reached_nodes_match_dijkstra(random_graph, max_distance):
+    origin = random.Random(0).choice(list(random_graph.graph))
+    reached = reachable_nodes(random_graph, origin, max_distance, SAFETY_THRESHOLD)
+    found = {(lat, lon): cost for lat, lon, cost in zip(reached['lats'], reached['lons'], reached['costs'])}
+
+    expected = {}
+    for node in random_graph.graph:
+        _, distance = dijkstra(random_graph, origin, node, SAFETY_THRESHOLD)
+        if distance <= max_distance:
+            expected[node] = distance
+    assert found.keys() == expected.keys()
+    for node, cost in expected.items():
+        assert found[node] == pytest.approx(cost)
+    assert (np.diff(reached['costs']) >= 0).all()
+
+
+def test_budget_boundary_is_inclusive(random_graph):
+    origin = list(random_graph.graph)[0]
+    costs = reachable_nodes(random_graph, origin, math.inf, SAFETY_THRESHOLD)['costs']
+    budget = float(costs[len(costs) // 2])
+
+    assert reachable_nodes(random_graph, origin, budget, SAFETY_THRESHOLD)['costs'].max() == budget
+    assert reachable_nodes(random_graph, origin, math.nextafter(budget, 0), SAFETY_THRESHOLD)['costs'].max() < budget
+
+
+@pytest.mark.parametrize('sectors', [3, 4, 16])
+def test_polygon_contains_origin(random_graph, sectors):
+    for origin in random.Random(1).sample(list(random_graph.graph), 10):
+        polygon = isochrone(random_graph, origin, 1.5, SAFETY_THRESHOLD, sectors)['polygon']
+        if polygon is not None:
+            assert contains(polygon, origin)
+
+
+def test_one_sided_reach_keeps_origin_in_polygon():
+    graph = Graph()
+    origin = (30.30, 78.00)
+    for i in range(5):
+        graph.add_edge(origin, (30.30 + 0.002 * (i - 2), 78.01), 1.0, 80)
+
+    polygon = isochrone(graph, origin, 2.0, SAFETY_THRESHOLD, 16)['polygon']
+    assert [30.30, 78.00] in polygon
+    assert contains(polygon, (30.30, 78.005))
+    assert not contains(polygon, (30.30, 77.995))
+
+
+def test_polygon_needs_three_vertices():
+    origin = (30.30, 78.00)
+    assert reachable_polygon(origin, np.array([]), np.array([])) is None
+    assert reachable_polygon(origin, np.array([30.30, 30.31]), np.array([78.00, 78.01])) is None
+
+
+def test_parallel_isochrones_match_serial(random_graph):
+    origins = random.Random(2).sample(list(random_graph.graph), 5)
+    serial = isochrones(random_graph, origins, 2.0, SAFETY_THRESHOLD, workers=1)
+    parallel = isochrones(random_graph, origins, 2.0, SAFETY_THRESHOLD, workers=2)
+
+    assert [result['origin'] for result in parallel] == origins
+    for expected, result in zip(serial, parallel):
+        assert result['polygon'] == expected['polygon']
+        for key in ('lats', 'lons', 'costs'):
+            assert np.array_equal(result[key], expected[key])
@@ -0,0 +1,80 @@
+import random
+
+import numpy as np
+import pytest
+
+from routing import dijkstra, a_star, haversine
+from landmarks import Landmarks, graph_fingerprint
+from conftest import make_random_graph
+
+
+@pytest.mark.parametrize('method', ['farthest', 'avoid'])
+def test_bounds_never_overestimate(random_graph, method):
+    landmarks = Landmarks.build(random_graph, count=4, method=method)
+    assert len(set(landmarks.landmarks)) == len(landmarks.landmarks)
+
+    nodes = list(random_graph.graph)
+    rng = random.Random(0)
+    for _ in range(100):
+        a, b = rng.sample(nodes, 2)
+        _, distance = dijkstra(random_graph, a, b, 0)
+        bound = landmarks.lower_bound(a, b)
+        assert haversine(a, b) <= bound <= distance + 1e-9
+
+
+def test_every_component_gets_a_landmark():
+    graph = make_random_graph(0, components=3)
+    landmarks = Landmarks.build(graph, count=3, method='farthest')
+    # Component c spans latitudes 30.25 + 0.1 * c to 30.30 + 0.1 * c
+    assert {int((lat - 30.25) // 0.1) for lat, _ in landmarks.landmarks} == {0, 1, 2}
+
+
+def test_save_load_round_trip(tmp_path, random_graph):
+    landmarks = Landmarks.build(random_graph, count=4)
+    path = str(tmp_path / 'landmarks.npz')
+    landmarks.save(path)
+
+    loaded = Landmarks.load(path, random_graph)
+    assert loaded is not None
+    assert loaded.nodes == landmarks.nodes
+    assert loaded.fingerprint == landmarks.fingerprint
+    np.testing.assert_array_equal(loaded.landmark_ids, landmarks.landmark_ids)
+    np.testing.assert_array_equal(loaded.distances, landmarks.distances)
+
+    target = landmarks.nodes[-1]
+    original, reloaded = landmarks.heuristic_to(target), loaded.heuristic_to(target)
+    assert all(original(node) == reloaded(node) for node in landmarks.nodes)
+
+
+def test_load_accepts_safety_changes(tmp_path):
+    graph = make_random_graph(0)
+    path = str(tmp_path / 'landmarks.npz')
+    Landmarks.build(graph, count=4).save(path)
+
+    fingerprint = graph_fingerprint(graph, include_safety=True)
+    for key in graph.safety_scores:
+        graph.safety_scores[key] = 100 - graph.safety_scores[key]
+    assert Landmarks.load(path, graph) is not None
+    assert graph_fingerprint(graph, include_safety=True) != fingerprint
+
+
+def test_load_rejects_changed_roads(tmp_path):
+    graph = make_random_graph(0)
+    path = str(tmp_path / 'landmarks.npz')
+    Landmarks.build(graph, count=4).save(path)
+    fingerprint = graph_fingerprint(graph)
+
+    # Shortcuts between existing nodes keep the node set the same
+    nodes = list(graph.graph)
+    rng = random.Random(0)
+    for _ in range(10):
+        u, v = rng.sample(nodes[:60], 2)
+        graph.add_edge(u, v, haversine(u, v), 90)
+    assert set(graph.graph) == set(nodes)
+    assert graph_fingerprint(graph) != fingerprint
+    assert Landmarks.load(path, graph) is None
+
+    rebuilt = Landmarks.build(graph, count=4)
+    for _ in range(50):
+        a, b = rng.sample(nodes[:60], 2)
+        assert a_star(graph, a, b, 0, rebuilt)[1] == pytest.approx(dijkstra(graph, a, b, 0)[1])
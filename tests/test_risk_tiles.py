@@ -0,0 +1,39 @@
+import numpy as np
+
+import risk_tiles
+from risk_tiles import TILE_SIZE, BLUR_PASSES, BOX_RADIUS, tile_rasters, to_pixels
+
+
+def full_raster(px, py, weights, x0, y0, width, height):
+    raster = np.zeros((height, width), dtype=np.float32)
+    np.add.at(raster, (py - y0, px - x0), weights)
+    for _ in range(BLUR_PASSES):
+        raster = risk_tiles._box_blur(raster, BOX_RADIUS, axis=0)
+        raster = risk_tiles._box_blur(raster, BOX_RADIUS, axis=1)
+    return raster
+
+
+def test_tiles_match_one_large_raster():
+    zoom = 13
+    tx0, ty0, tx1, ty1 = risk_tiles._tile_range(zoom)
+    rng = np.random.default_rng(0)
+    # Cluster incidents on a tile corner so their heat spans four tiles
+    corner = ((tx0 + tx1) // 2 * TILE_SIZE, (ty0 + ty1) // 2 * TILE_SIZE)
+    px = corner[0] + rng.integers(-20, 20, 50)
+    py = corner[1] + rng.integers(-20, 20, 50)
+    weights = rng.uniform(1, 5, 50)
+
+    scale = TILE_SIZE * 2 ** zoom
+    lons = (px + 0.5) / scale * 360 - 180
+    lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (py + 0.5) / scale))))
+    x, y = to_pixels(lats, lons, zoom)
+    assert (np.floor(x) == px).all() and (np.floor(y) == py).all()
+
+    tiles = {(tx, ty): raster for tx, ty, raster in tile_rasters(lats, lons, weights, zoom)}
+    assert len(tiles) == 4
+
+    x0, y0 = min(tiles)[0] * TILE_SIZE, min(t[1] for t in tiles) * TILE_SIZE
+    expected = full_raster(px, py, weights, x0, y0, 2 * TILE_SIZE, 2 * TILE_SIZE)
+    for (tx, ty), raster in tiles.items():
+        col, row = tx * TILE_SIZE - x0, ty * TILE_SIZE - y0
+        np.testing.assert_allclose(raster, expected[row:row + TILE_SIZE, col:col + TILE_SIZE], atol=1e-4)
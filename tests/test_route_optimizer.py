@@ -0,0 +1,98 @@
+import itertools
+import math
+import random
+
+import pytest
+
+from conftest import make_random_graph
+from route_optimizer import nearest_neighbour, optimise_stops, solve_order, tour_cost
+
+MODES = ['open', 'fixed_end', 'return_to_start']
+
+
+def random_matrix(seed, n):
+    """Symmetric Euclidean distances between `n` random points."""
+    rng = random.Random(seed)
+    points = [(rng.random(), rng.random()) for _ in range(n)]
+    return [[math.dist(p, q) for q in points] for p in points]
+
+
+def mode_args(mode, n):
+    start = 0
+    end = n - 1 if mode == 'fixed_end' else None
+    return start, end, mode == 'return_to_start'
+
+
+def brute_force(matrix, start, end, return_to_start):
+    middle = [i for i in range(len(matrix)) if i not in (start, end)]
+    best = math.inf
+    for perm in itertools.permutations(middle):
+        order = [start, *perm]
+        if return_to_start:
+            order.append(start)
+        elif end is not None:
+            order.append(end)
+        best = min(best, tour_cost(order, matrix))
+    return best
+
+
+@pytest.mark.parametrize('mode', MODES)
+@pytest.mark.parametrize('n', [2, 3, 5, 8])
+@pytest.mark.parametrize('seed', range(5))
+def test_solve_order_is_valid_and_near_optimal(seed, n, mode):
+    matrix = random_matrix(seed, n)
+    start, end, return_to_start = mode_args(mode, n)
+    order = solve_order(matrix, start, end, return_to_start, time_limit=1)
+
+    assert order[0] == start
+    if return_to_start:
+        assert order[-1] == start
+        assert sorted(order[:-1]) == list(range(n))
+    else:
+        assert sorted(order) == list(range(n))
+        if end is not None:
+            assert order[-1] == end
+
+    cost = tour_cost(order, matrix)
+    greedy = nearest_neighbour(matrix, start) + [start] if return_to_start else nearest_neighbour(matrix, start, end)
+    assert cost <= tour_cost(greedy, matrix) + 1e-9
+    assert cost <= brute_force(matrix, start, end, return_to_start) * 1.05 + 1e-9
+
+
+def test_end_must_differ_from_start():
+    with pytest.raises(ValueError):
+        solve_order(random_matrix(0, 4), start=1, end=1)
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_optimise_stops_stitches_the_road_path(mode):
+    graph = make_random_graph(0)
+    # The first component only, which is connected at threshold 0
+    stops = random.Random(1).sample([node for node in graph.graph if node[0] < 30.3], 6)
+    start, end, return_to_start = mode_args(mode, len(stops))
+    result = optimise_stops(graph, stops, 0, start, end, return_to_start, time_limit=1)
+
+    order, path = result['order'], result['path']
+    assert order[0] == start
+    if return_to_start or end is not None:
+        assert order[-1] == (start if return_to_start else end)
+    assert path[0] == stops[order[0]] and path[-1] == stops[order[-1]]
+    assert all(v in graph.get_neighbors(u) for u, v in zip(path, path[1:]))
+    assert sum(graph.get_weight(u, v) for u, v in zip(path, path[1:])) == pytest.approx(result['distance'])
+    assert sum(result['legs']) == pytest.approx(result['distance'])
+    assert set(stops) <= set(path)
+    assert result['min_safety'] == pytest.approx(min(graph.get_safety_score(u, v) for u, v in zip(path, path[1:])))
+
+
+def test_optimise_stops_rejects_unreachable_stops():
+    graph = make_random_graph(0)
+    nodes = list(graph.graph)
+    # One stop in each component
+    stops = [next(n for n in nodes if n[0] < 30.3), next(n for n in nodes if n[0] >= 30.35)]
+    with pytest.raises(ValueError, match="cannot be reached"):
+        optimise_stops(graph, stops, 0, time_limit=1)
+
+
+def test_optimise_stops_rejects_empty_input():
+    with pytest.raises(ValueError):
+        optimise_stops(make_random_graph(0), [])
@@ -0,0 +1,59 @@
+import math
+import random
+
+import pytest
+
+from routing import dijkstra, a_star, bidirectional_a_star
+from landmarks import Landmarks
+
+THRESHOLDS = [0, 30, 60, 90]
+
+
+def assert_valid_path(graph, path, start, end, distance, safety_threshold):
+    assert path[0] == start and path[-1] == end
+    assert all(graph.get_safety_score(u, v) >= safety_threshold for u, v in zip(path, path[1:]))
+    assert sum(graph.get_weight(u, v) for u, v in zip(path, path[1:])) == pytest.approx(distance)
+
+
+def searches(landmarks):
+    return {
+        'a_star': lambda g, s, e, t: a_star(g, s, e, t),
+        'a_star_landmarks': lambda g, s, e, t: a_star(g, s, e, t, landmarks),
+        'bidirectional': lambda g, s, e, t: bidirectional_a_star(g, s, e, t),
+        'bidirectional_landmarks': lambda g, s, e, t: bidirectional_a_star(g, s, e, t, landmarks),
+    }
+
+
+@pytest.mark.parametrize('safety_threshold', THRESHOLDS)
+def test_searches_match_dijkstra(random_graph, safety_threshold):
+    landmarks = Landmarks.build(random_graph, count=4)
+    nodes = list(random_graph.graph)
+    rng = random.Random(safety_threshold)
+    # Pairs are drawn from all nodes, so some cross components
+    pairs = [tuple(rng.sample(nodes, 2)) for _ in range(40)]
+
+    for start, end in pairs:
+        expected_path, expected = dijkstra(random_graph, start, end, safety_threshold)
+        for name, search in searches(landmarks).items():
+            path, distance = search(random_graph, start, end, safety_threshold)
+            if expected_path is None:
+                assert path is None and distance == math.inf, name
+            else:
+                assert distance == pytest.approx(expected), name
+                assert_valid_path(random_graph, path, start, end, distance, safety_threshold)
+
+
+def test_unreachable_across_components(random_graph):
+    landmarks = Landmarks.build(random_graph, count=4)
+    nodes = list(random_graph.graph)
+    start, end = nodes[0], nodes[-1]
+    assert dijkstra(random_graph, start, end, 0) == (None, math.inf)
+    for name, search in searches(landmarks).items():
+        assert search(random_graph, start, end, 0) == (None, math.inf), name
+
+
+def test_start_equals_end(random_graph):
+    landmarks = Landmarks.build(random_graph, count=4)
+    node = next(iter(random_graph.graph))
+    for name, search in searches(landmarks).items():
+        assert search(random_graph, node, node, 50) == ([node], 0), name
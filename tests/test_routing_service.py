@@ -0,0 +1,150 @@
+import threading
+import time
+
+import pytest
+
+from routing import Graph, dijkstra
+from routing_service import RoutingProvider, LocalRoutingProvider
+
+A = [[78.00, 30.30], [78.01, 30.31]]
+B = [[78.02, 30.32], [78.03, 30.33]]
+C = [[78.04, 30.34], [78.05, 30.35]]
+
+
+class FakeProvider(RoutingProvider):
+    """Counts backend calls; blocks each call until `release` is set."""
+
+    def __init__(self, error=None, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+        self.error = error
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def _fetch_directions(self, coordinates, profile, format):
+        self.calls += 1
+        self.started.set()
+        self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return {'coordinates': coordinates, 'call': self.calls}
+
+
+def run_concurrently(provider, coordinates, count):
+    results = [None] * count
+
+    def call(i):
+        try:
+            results[i] = provider.directions(coordinates)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+    provider.release.clear()
+    for thread in threads:
+        thread.start()
+    assert provider.started.wait(5)
+    # Give the other callers time to join the in-flight request
+    time.sleep(0.2)
+    provider.release.set()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_identical_concurrent_requests_are_coalesced():
+    provider = FakeProvider(cache_enabled=False)
+    results = run_concurrently(provider, A, 8)
+    assert provider.calls == 1
+    assert all(result == results[0] for result in results)
+    assert not provider._in_flight
+
+
+def test_errors_reach_every_waiting_caller():
+    provider = FakeProvider(error=ValueError("backend down"), cache_enabled=False)
+    results = run_concurrently(provider, A, 5)
+    assert provider.calls == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+    # Failures are not cached and the request can be retried
+    provider.error = None
+    assert provider.directions(A)['call'] == 2
+
+
+def test_concurrency_cap_times_out():
+    provider = FakeProvider(max_concurrent=1, timeout=0.1, cache_enabled=False)
+    provider.release.clear()
+    holder = threading.Thread(target=provider.directions, args=(A,))
+    holder.start()
+    assert provider.started.wait(5)
+    try:
+        with pytest.raises(TimeoutError):
+            provider.directions(B)
+    finally:
+        provider.release.set()
+        holder.join(5)
+    assert provider.calls == 1
+
+
+def test_cache_entries_expire():
+    provider = FakeProvider(cache_timeout=0.05)
+    provider.directions(A)
+    provider.directions(A)
+    assert provider.calls == 1
+    time.sleep(0.1)
+    provider.directions(A)
+    assert provider.calls == 2
+
+
+def test_cache_evicts_least_recently_used():
+    provider = FakeProvider(cache_max_size=2)
+    provider.directions(A)
+    provider.directions(B)
+    provider.directions(A)
+    provider.directions(C)
+    assert provider.calls == 3
+
+    provider.directions(A)
+    assert provider.calls == 3
+    provider.directions(B)
+    assert provider.calls == 4
+
+
+@pytest.fixture
+def graph():
+    graph = Graph()
+    graph.add_edge((30.30, 78.00), (30.31, 78.01), 1.5, 80)
+    graph.add_edge((30.31, 78.01), (30.32, 78.02), 1.5, 80)
+    graph.add_edge((30.30, 78.00), (30.32, 78.02), 4.0, 90)
+    graph.add_edge((30.40, 78.10), (30.41, 78.11), 1.0, 90)
+    return graph
+
+
+def test_local_provider_returns_ors_geojson(graph):
+    provider = LocalRoutingProvider(graph, safety_threshold=50, speed_kmh=30, cache_enabled=False)
+    route = provider.directions([[78.0001, 30.3001], [78.0201, 30.3199]])
+
+    assert route['type'] == 'FeatureCollection'
+    feature = route['features'][0]
+    assert feature['geometry']['type'] == 'LineString'
+    assert feature['geometry']['coordinates'] == [[78.00, 30.30], [78.01, 30.31], [78.02, 30.32]]
+    assert feature['properties']['way_points'] == [0, 2]
+
+    _, expected = dijkstra(graph, (30.30, 78.00), (30.32, 78.02), 50)
+    summary = feature['properties']['summary']
+    assert summary['distance'] == pytest.approx(expected * 1000)
+    assert summary['duration'] == pytest.approx(expected / 30 * 3600)
+    assert route['bbox'] == [78.00, 30.30, 78.02, 30.32]
+
+
+def test_local_provider_respects_safety_threshold(graph):
+    provider = LocalRoutingProvider(graph, safety_threshold=85, cache_enabled=False)
+    route = provider.directions([[78.00, 30.30], [78.02, 30.32]])
+    assert route['features'][0]['geometry']['coordinates'] == [[78.00, 30.30], [78.02, 30.32]]
+
+
+def test_local_provider_raises_when_unreachable(graph):
+    provider = LocalRoutingProvider(graph, cache_enabled=False)
+    with pytest.raises(ValueError):
+        provider.directions([[78.00, 30.30], [78.10, 30.40]])
@@ -0,0 +1,50 @@
+import time
+
+import tracing
+
+
+def test_total_does_not_double_count_nested_spans(monkeypatch):
+    monkeypatch.setattr(tracing, 'enabled', True)
+    with tracing.trace_request() as trace:
+        with tracing.span('outer'):
+            with tracing.span('inner'):
+                time.sleep(0.05)
+
+    breakdown = trace.breakdown()
+    assert set(breakdown) == {'outer', 'inner'}
+    assert trace.total() >= breakdown['outer']
+    assert trace.total() < breakdown['outer'] + breakdown['inner']
+
+
+def test_prometheus_export(monkeypatch, tmp_path):
+    monkeypatch.setattr(tracing, 'enabled', True)
+    tracing.reset()
+    try:
+        for seconds in (0.003, 0.03, 0.3, 30.0):
+            tracing.observe('dijkstra', seconds)
+        tracing.incr('dijkstra_nodes_expanded', 5)
+        tracing.incr('dijkstra_nodes_expanded', 2)
+
+        path = tmp_path / 'metrics.prom'
+        tracing.write_metrics(str(path))
+        lines = path.read_text().splitlines()
+    finally:
+        tracing.reset()
+
+    buckets = {line.split('le="')[1].split('"')[0]: int(line.rsplit(' ', 1)[1])
+               for line in lines if line.startswith('route_planner_stage_seconds_bucket{stage="dijkstra"')}
+    # Cumulative: each bucket counts every observation at or below its bound
+    assert buckets['0.001'] == 0
+    assert buckets['0.005'] == 1
+    assert buckets['0.05'] == 2
+    assert buckets['0.5'] == 3
+    assert buckets['10.0'] == 3
+    assert buckets['+Inf'] == 4
+    counts = list(buckets.values())
+    assert counts == sorted(counts)
+
+    assert 'route_planner_stage_seconds_count{stage="dijkstra"} 4' in lines
+    assert any(line.startswith('route_planner_stage_seconds_sum{stage="dijkstra"} 30.33') for line in lines)
+    assert '# TYPE route_planner_dijkstra_nodes_expanded_total counter' in lines
+    assert 'route_planner_dijkstra_nodes_expanded_total 7.0' in lines
+    assert not (tmp_path / 'metrics.prom.tmp').exists()
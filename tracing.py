@@ -0,0 +1,219 @@
+"""
+Lightweight tracing for the route planner hot paths.
+
+`span(name)` times a stage, `incr(name, amount)` bumps a counter. Both are
+no-ops unless `TRACING_ENABLED` is set, so instrumented code pays only a
+function call when tracing is off. Inside `trace_request()` every span and
+counter is also collected into a per-request breakdown.
+
+Aggregated metrics can be exported in Prometheus text format to a file
+(`METRICS_FILE`) or over HTTP (`METRICS_PORT`).
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from src.config.config import TRACING_ENABLED, METRICS_FILE, LOG_LEVEL, LOG_FILE
+
+METRIC_PREFIX = "route_planner"
+# Histogram bucket upper bounds in seconds
+BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+enabled: bool = TRACING_ENABLED
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = defaultdict(float)
+_span_counts: Dict[str, int] = defaultdict(int)
+_span_sums: Dict[str, float] = defaultdict(float)
+_span_buckets: Dict[str, List[int]] = defaultdict(lambda: [0] * len(BUCKETS))
+_current_request = contextvars.ContextVar('current_request', default=None)
+
+
+def configure_logging(level: str = LOG_LEVEL, log_file: Optional[str] = LOG_FILE) -> logging.Logger:
+    """Configure the `route_planner` logger from the logging settings."""
+    logger = logging.getLogger(METRIC_PREFIX)
+    if logger.handlers:
+        return logger
+    logger.setLevel(level.upper())
+    formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s')
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+    return logger
+
+
+class RequestTrace:
+    """Spans and counters recorded while handling a single request."""
+
+    def __init__(self):
+        self.spans: List[Tuple[str, float]] = []
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def breakdown(self) -> Dict[str, float]:
+        """
+        Total seconds spent in each stage, in the order stages first ran.
+        Nested stages are also counted in the stage that encloses them.
+        """
+        totals: Dict[str, float] = {}
+        for name, seconds in self.spans:
+            totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
+    def total(self) -> float:
+        """Wall time of the request, so nested spans are not counted twice."""
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def span(name: str):
+    """Context manager timing the enclosed block as stage `name`."""
+    if not enabled:
+        return _NOOP_SPAN
+    return _Span(name)
+
+
+def observe(name: str, seconds: float):
+    """Record that stage `name` took `seconds`."""
+    if not enabled:
+        return
+    with _lock:
+        _span_counts[name] += 1
+        _span_sums[name] += seconds
+        buckets = _span_buckets[name]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                buckets[i] += 1
+    trace = _current_request.get()
+    if trace is not None:
+        trace.spans.append((name, seconds))
+
+
+def incr(name: str, amount: float = 1):
+    """Add `amount` to counter `name`."""
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] += amount
+    trace = _current_request.get()
+    if trace is not None:
+        trace.counters[name] += amount
+
+
+@contextmanager
+def trace_request():
+    """Collect the spans and counters of the enclosed block; yields None when disabled."""
+    if not enabled:
+        yield None
+        return
+    trace = RequestTrace()
+    token = _current_request.set(trace)
+    try:
+        yield trace
+    finally:
+        trace.finished = time.perf_counter()
+        _current_request.reset(token)
+
+
+def reset():
+    """Drop all aggregated metrics."""
+    with _lock:
+        _counters.clear()
+        _span_counts.clear()
+        _span_sums.clear()
+        _span_buckets.clear()
+
+
+def export_prometheus() -> str:
+    """Aggregated metrics in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        if _span_counts:
+            metric = f"{METRIC_PREFIX}_stage_seconds"
+            lines.append(f"# HELP {metric} Time spent in each request stage.")
+            lines.append(f"# TYPE {metric} histogram")
+            for name in sorted(_span_counts):
+                # Buckets are already cumulative: observe() fills every bound >= the value
+                for bound, count in zip(BUCKETS, _span_buckets[name]):
+                    lines.append(f'{metric}_bucket{{stage="{name}",le="{bound}"}} {count}')
+                lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} {_span_counts[name]}')
+                lines.append(f'{metric}_sum{{stage="{name}"}} {_span_sums[name]}')
+                lines.append(f'{metric}_count{{stage="{name}"}} {_span_counts[name]}')
+        for name in sorted(_counters):
+            metric = f"{METRIC_PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {_counters[name]}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path: Optional[str] = METRICS_FILE):
+    """Write the Prometheus export to `path` if one is configured."""
+    if not enabled or not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(export_prometheus())
+    # Replace in one step so scrapers never read a half-written file
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        body = export_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """Serve `/metrics` from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True)
+    thread.start()
+    return server